@@ -0,0 +1,209 @@
+"""
+Album Art Cache
+Disk-backed LRU of downscaled album covers, keyed by album id
+"""
+import importlib.util
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from settings import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# Pillow is optional: without it the smallest Spotify rendition >= THUMB_SIZE is stored as is
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+CACHE_DIR = "album_art_cache"
+MAX_BYTES = 20 * 1024 * 1024
+THUMB_SIZE = 300
+FETCH_TIMEOUT = 10
+KNOWN_LIMIT = 100
+
+ALBUM_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+MIMETYPES = {ext: mime for mime, ext in EXTENSIONS.items()}
+
+
+def pick_image(images, size=THUMB_SIZE):
+    """URL of the smallest image at least size px wide, else the largest one"""
+    sized = [img for img in images if img.get("url")]
+    if not sized:
+        return ""
+    sized.sort(key=lambda img: img.get("width") or 0)
+    for img in sized:
+        if (img.get("width") or 0) >= size:
+            return img["url"]
+    return sized[-1]["url"]
+
+
+class AlbumArtCache:
+    """
+    Covers live in directory as <album_id><ext>. The in-memory index is
+    ordered oldest-used first and seeded from file mtimes, so the LRU order
+    survives restarts; get() bumps the mtime on every hit. After each store
+    the oldest files are evicted until the directory fits max_bytes.
+
+    The tracker only remember()s the remote URL for an id. The first
+    request for it downloads once (concurrent requests wait on the same
+    per-id lock) and every later one is served from disk.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, thumb_size=THUMB_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.thumb_size = thumb_size
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._index = None
+        self._total = 0
+        self._known = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "fetch_errors": 0, "evictions": 0}
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                album_id, ext = os.path.splitext(name)
+                if ext not in MIMETYPES:
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, album_id, name, st.st_size))
+        entries.sort()
+        self._index = OrderedDict((album_id, (name, size)) for _, album_id, name, size in entries)
+        self._total = sum(size for _, _, _, size in entries)
+
+    def remember(self, album_id, url):
+        """Note where the cover for album_id can be downloaded from"""
+        if not album_id or not url or not ALBUM_ID_PATTERN.match(album_id):
+            return
+        with self._lock:
+            self._known[album_id] = url
+            self._known.move_to_end(album_id)
+            while len(self._known) > KNOWN_LIMIT:
+                self._known.popitem(last=False)
+
+    def source_url(self, album_id):
+        with self._lock:
+            return self._known.get(album_id)
+
+    def get(self, album_id):
+        """Return (path, mimetype) for a cached cover, or None"""
+        with self._lock:
+            self._load_index()
+            entry = self._index.get(album_id)
+            if entry is None:
+                return None
+            self._index.move_to_end(album_id)
+            self.stats["hits"] += 1
+        path = os.path.join(self.directory, entry[0])
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._drop(album_id)
+            return None
+        return path, MIMETYPES[os.path.splitext(entry[0])[1]]
+
+    def fetch(self, album_id):
+        """Return (path, mimetype), downloading the cover first if needed"""
+        if not ALBUM_ID_PATTERN.match(album_id):
+            return None
+        cached = self.get(album_id)
+        if cached is not None:
+            return cached
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(album_id, threading.Lock())
+        with fetch_lock:
+            cached = self.get(album_id)
+            if cached is not None:
+                return cached
+            url = self.source_url(album_id)
+            if not url:
+                return None
+            with self._lock:
+                self.stats["misses"] += 1
+            try:
+                data, mimetype = self._download(url)
+                return self._store(album_id, data, mimetype), mimetype
+            except Exception as e:
+                with self._lock:
+                    self.stats["fetch_errors"] += 1
+                logger.error(f"Album art fetch failed for {album_id}: {e}")
+                return None
+            finally:
+                with self._lock:
+                    self._fetch_locks.pop(album_id, None)
+
+    def _download(self, url):
+        import requests
+        response = requests.get(url, timeout=FETCH_TIMEOUT)
+        response.raise_for_status()
+        mimetype = response.headers.get("Content-Type", "image/jpeg").split(";")[0].strip()
+        data = response.content
+        if PIL_AVAILABLE:
+            data, mimetype = self._thumbnail(data), "image/jpeg"
+        elif mimetype not in EXTENSIONS:
+            mimetype = "image/jpeg"
+        return data, mimetype
+
+    def _thumbnail(self, data):
+        import io
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as image:
+            image = image.convert("RGB")
+            image.thumbnail((self.thumb_size, self.thumb_size))
+            out = io.BytesIO()
+            image.save(out, format="JPEG", quality=85, optimize=True)
+        return out.getvalue()
+
+    def _store(self, album_id, data, mimetype):
+        os.makedirs(self.directory, exist_ok=True)
+        name = album_id + EXTENSIONS[mimetype]
+        path = os.path.join(self.directory, name)
+        atomic_write_text(path, data)
+        with self._lock:
+            self._load_index()
+            previous = self._index.get(album_id)
+            self._drop(album_id, remove_file=previous is not None and previous[0] != name)
+            self._index[album_id] = (name, len(data))
+            self._total += len(data)
+            self._evict()
+        return path
+
+    def _drop(self, album_id, remove_file=True):
+        entry = self._index.pop(album_id, None)
+        if entry is None:
+            return
+        self._total -= entry[1]
+        if remove_file:
+            try:
+                os.remove(os.path.join(self.directory, entry[0]))
+            except OSError:
+                pass
+
+    def _evict(self):
+        # Never evict the entry just stored, even if it alone exceeds the cap
+        while self._total > self.max_bytes and len(self._index) > 1:
+            album_id = next(iter(self._index))
+            self._drop(album_id)
+            self.stats["evictions"] += 1
+
+    def get_stats(self):
+        with self._lock:
+            self._load_index()
+            stats = dict(self.stats)
+            stats["entries"] = len(self._index)
+            stats["bytes"] = self._total
+            stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+cache = AlbumArtCache()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+OSC Encoding Micro-benchmark
+Compares python-osc's SimpleUDPClient.send_message with the cached datagram path
+
+Run from the project root:
+    python benchmarks/bench_osc_encoding.py [iterations]
+"""
+import os
+import socket
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pythonosc.udp_client import SimpleUDPClient
+
+import osc_encoding
+from osc_targets import OSCTarget
+from osc_transport import AsyncOSCTransport
+
+MESSAGE = "⏰ 9:41 PM\nCustom Message Test\n🎶 Song Name - Artist [1:23 / 3:45]\n█████░░░░░"
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    sink.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    port = sink.getsockname()[1]
+
+    legacy = SimpleUDPClient("127.0.0.1", port)
+    transport = AsyncOSCTransport()
+    transport.reconfigure([OSCTarget("bench", "127.0.0.1", port)])
+
+    async def send_in_loop(count):
+        for _ in range(count):
+            await transport.send_chatbox_async(MESSAGE)
+
+    def in_loop_per_op():
+        start = time.perf_counter()
+        transport.submit(send_in_loop(iterations)).result()
+        return time.perf_counter() - start
+
+    cases = [
+        ("python-osc chatbox", lambda: legacy.send_message("/chatbox/input", [MESSAGE, True])),
+        ("cached chatbox (from thread)", lambda: transport.send_chatbox(MESSAGE)),
+        ("python-osc visible", lambda: legacy.send_message("/chatbox/visible", 1)),
+        ("cached visible (from thread)", lambda: transport.send_visible(True)),
+        ("encode only (python-osc)", lambda: osc_encoding.build_datagram("/chatbox/input", [MESSAGE, True])),
+        ("encode only (cached)", lambda: osc_encoding.encode_chatbox(MESSAGE)),
+    ]
+
+    print(f"{'case':<30}{'us/op':>10}")
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=iterations, repeat=3))
+        print(f"{name:<30}{seconds / iterations * 1e6:>10.2f}")
+
+    seconds = min(in_loop_per_op() for _ in range(3))
+    print(f"{'cached chatbox (awaited)':<30}{seconds / iterations * 1e6:>10.2f}")
+
+    print(f"\ncache: {osc_encoding.datagram_cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
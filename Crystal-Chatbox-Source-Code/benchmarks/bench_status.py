@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+/status Latency Benchmark
+Hammers /status from N concurrent pollers through Flask's test client
+
+Run from the project root (settings are loaded from a throwaway directory):
+    python benchmarks/bench_status.py [seconds]
+"""
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="crystal-bench-")
+if os.path.exists(os.path.join(PROJECT_ROOT, "settings.json")):
+    shutil.copy(os.path.join(PROJECT_ROOT, "settings.json"), WORKDIR)
+os.chdir(WORKDIR)
+
+import routes
+import spotify
+
+POLLER_COUNTS = (1, 10, 50)
+
+
+def run_pollers(app, pollers, duration):
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def poll():
+        client = app.test_client()
+        local = []
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            client.get("/status")
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=poll) for _ in range(pollers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+
+    with spotify.spotify_lock:
+        spotify.spotify_state.update(song_text="Benchmark Song - Artist", song_pos=61, song_dur=215)
+
+    print(f"{'pollers':>8}{'req/s':>10}{'mean ms':>10}{'p95 ms':>10}")
+    for pollers in POLLER_COUNTS:
+        latencies = run_pollers(routes.app, pollers, duration)
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{pollers:>8}{len(latencies) / duration:>10.0f}"
+              f"{statistics.mean(latencies) * 1000:>10.2f}{p95 * 1000:>10.2f}")
+
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
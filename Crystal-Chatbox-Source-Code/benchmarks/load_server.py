@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Server Load Test
+Compares /status throughput of the Flask development server and --server mode
+
+Each mode is launched as a real process (settings come from a throwaway
+directory) and polled over HTTP by N concurrent keep-alive clients:
+    python benchmarks/load_server.py [seconds] [threads]
+"""
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLIENT_COUNTS = (1, 10, 50)
+MODES = (("dev server", ["--nogui"]), ("--server", ["--server"]))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch(args, port, threads, workdir):
+    env = dict(os.environ, PORT=str(port), HOST="127.0.0.1", WEB_THREADS=str(threads))
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(PROJECT_ROOT, "main.py")] + args,
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}/status"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return proc, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"Server {args} did not come up on port {port}")
+
+
+def run_clients(url, clients, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def poll():
+        session = requests.Session()
+        local = []
+        failed = 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                session.get(url, timeout=10).raise_for_status()
+                local.append(time.perf_counter() - start)
+            except requests.RequestException:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=poll) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    print(f"{'mode':>12}{'clients':>9}{'req/s':>10}{'mean ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for label, args in MODES:
+        workdir = tempfile.mkdtemp(prefix="crystal-load-")
+        if os.path.exists(os.path.join(PROJECT_ROOT, "settings.json")):
+            shutil.copy(os.path.join(PROJECT_ROOT, "settings.json"), workdir)
+        proc, url = launch(args, free_port(), threads, workdir)
+        try:
+            for clients in CLIENT_COUNTS:
+                latencies, errors = run_clients(url, clients, duration)
+                if not latencies:
+                    print(f"{label:>12}{clients:>9}{'-':>10}{'-':>10}{'-':>10}{errors:>8}")
+                    continue
+                latencies.sort()
+                p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+                print(f"{label:>12}{clients:>9}{len(latencies) / duration:>10.0f}"
+                      f"{statistics.mean(latencies) * 1000:>10.2f}{p95 * 1000:>10.2f}{errors:>8}")
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Chatbox Change Detection
+Fingerprints composed chatbox messages so identical resends can be skipped
+"""
+import hashlib
+import threading
+import time
+
+
+def fingerprint(text):
+    """Short stable digest of a message or module contribution"""
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ChangeDetector:
+    """
+    Tracks the fingerprint of the last message actually delivered and of each
+    module's contribution to the last composition.
+
+    An unchanged message is suppressed unless keepalive seconds have passed
+    since the last delivery, in which case it is resent once so the chatbox
+    does not time out in VRChat.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._module_fingerprints = {}
+        self._last_sent = 0.0
+        self.sent = 0
+        self.suppressed = 0
+        self.keepalives = 0
+        self.changed_modules = []
+
+    def should_send(self, message, parts=None, keepalive=0):
+        """Decide whether a composed message needs to go out"""
+        message_fp = fingerprint(message)
+        with self._lock:
+            if parts is not None:
+                module_fps = {name: fingerprint(text) for name, text in parts.items()}
+                names = set(module_fps) | set(self._module_fingerprints)
+                self.changed_modules = sorted(
+                    name for name in names
+                    if module_fps.get(name) != self._module_fingerprints.get(name)
+                )
+                self._module_fingerprints = module_fps
+
+            if message_fp != self._fingerprint:
+                return True
+
+            if keepalive > 0 and time.monotonic() - self._last_sent >= keepalive:
+                self.keepalives += 1
+                return True
+
+            self.suppressed += 1
+            return False
+
+    def record_sent(self, message):
+        """Remember a delivered message, whatever path sent it"""
+        message_fp = fingerprint(message)
+        with self._lock:
+            self._fingerprint = message_fp
+            self._last_sent = time.monotonic()
+            self.sent += 1
+
+    def reset(self):
+        """Forget the last delivery so the next composition is always sent"""
+        with self._lock:
+            self._fingerprint = None
+            self._module_fingerprints = {}
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "sent": self.sent,
+                "suppressed": self.suppressed,
+                "keepalives": self.keepalives,
+                "changed_modules": list(self.changed_modules)
+            }
@@ -0,0 +1,97 @@
+"""
+Clock Service
+Named clocks with resolved timezones and minute-granularity formatted text
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+LOCAL = "local"
+# {time:<zone>} arguments come from free-typed custom texts, so only the most
+# recently used zones are kept; an evicted clock is simply rebuilt on next use
+MAX_CLOCKS = 32
+
+
+def seconds_until_next_minute(now=None):
+    now = time.time() if now is None else now
+    return 60 - (now % 60)
+
+
+class Clock:
+    """
+    One timezone with its formatted time and date, valid until the next
+    minute boundary. All supported zones have whole-minute UTC offsets, so
+    the epoch minute boundary is a rollover for every clock.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.tz = None
+        if name != LOCAL:
+            try:
+                self.tz = pytz.timezone(name)
+            except pytz.UnknownTimeZoneError:
+                logger.error(f"Unknown timezone '{name}', using local time")
+        self.time_text = ""
+        self.date_text = ""
+        self._expires = 0.0
+
+    def refresh(self, now=None):
+        now = time.time() if now is None else now
+        current = datetime.fromtimestamp(now, self.tz) if self.tz else datetime.fromtimestamp(now)
+        self.time_text = current.strftime("%I:%M %p").lstrip("0")
+        self.date_text = current.strftime("%b %d").replace(" 0", " ")
+        self._expires = now - (now % 60) + 60
+
+    def text(self):
+        if time.time() >= self._expires:
+            self.refresh()
+        return self.time_text
+
+    def date(self):
+        if time.time() >= self._expires:
+            self.refresh()
+        return self.date_text
+
+
+_clocks = OrderedDict()
+_clocks_lock = threading.Lock()
+
+
+def get_clock(name=None):
+    """Return the clock for a timezone name, cached LRU among the last MAX_CLOCKS used"""
+    name = str(name or LOCAL)
+    with _clocks_lock:
+        clock = _clocks.get(name)
+        if clock is not None:
+            _clocks.move_to_end(name)
+            return clock
+        clock = Clock(name)
+        clock.refresh()
+        _clocks[name] = clock
+        while len(_clocks) > MAX_CLOCKS:
+            _clocks.popitem(last=False)
+    return clock
+
+
+def refresh_all():
+    """Recompute every registered clock in one pass, e.g. on minute rollover"""
+    now = time.time()
+    with _clocks_lock:
+        clocks = list(_clocks.values())
+    for clock in clocks:
+        clock.refresh(now)
+
+
+def time_text(name=None):
+    return get_clock(name).text()
+
+
+def date_text(name=None):
+    return get_clock(name).date()
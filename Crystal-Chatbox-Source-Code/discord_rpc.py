@@ -2,10 +2,13 @@
 Discord Rich Presence Integration
 Shows Discord activity in VRChat chatbox
 """
+import importlib.util
 import logging
 import threading
 import time
 
+from settings import SETTINGS
+
 logger = logging.getLogger(__name__)
 
 # Discord state
@@ -19,13 +22,13 @@ discord_state = {
 
 discord_lock = threading.Lock()
 discord_thread = None
+state_version = 0
+
+TRACKER_NAME = "Discord Tracker"
 
-# Try to import pypresence
-try:
-    from pypresence import Presence, InvalidID
-    PYPRESENCE_AVAILABLE = True
-except ImportError:
-    PYPRESENCE_AVAILABLE = False
+# pypresence is only looked up here; nothing imports it until RPC is used
+PYPRESENCE_AVAILABLE = importlib.util.find_spec("pypresence") is not None
+if not PYPRESENCE_AVAILABLE:
     logger.warning("pypresence not available - Discord integration disabled")
 
 def get_discord_state():
@@ -38,6 +41,7 @@ def update_discord_status():
     Try to get Discord status via local RPC
     NOTE: This only works if Discord is running locally
     """
+    global state_version
     if not PYPRESENCE_AVAILABLE:
         return False
     
@@ -48,6 +52,8 @@ def update_discord_status():
         
         with discord_lock:
             discord_state['connected'] = False
+            if discord_state['activity'] != "Not available (cloud environment)":
+                state_version += 1
             discord_state['activity'] = "Not available (cloud environment)"
         
         return False
@@ -59,48 +65,60 @@ def update_discord_status():
         return False
 
 def discord_updater_thread(interval=10):
-    """Background thread to update Discord status"""
+    """Background thread to update Discord status while it is enabled"""
     logger.info(f"[Discord] Thread started (interval: {interval}s)")
     
     while True:
         try:
-            with discord_lock:
-                enabled = discord_state.get('enabled', False)
+            SETTINGS.wait_until(lambda s: s.get("discord_enabled", False), ("discord_enabled",))
             
-            if enabled:
-                update_discord_status()
+            update_discord_status()
             
-            time.sleep(interval)
+            SETTINGS.wait_for_change(("discord_enabled",), timeout=interval)
             
         except Exception as e:
             logger.error(f"Discord updater error: {e}")
             time.sleep(60)
 
-def start_discord_tracker(interval=10, enabled=False):
-    """Start the Discord tracking thread"""
-    global discord_thread, discord_state
+def _on_discord_enabled(key, enabled):
+    if enabled:
+        enable_discord()
+    else:
+        disable_discord()
+
+def start_discord_tracker(interval=10):
+    """Start the Discord tracking thread; it follows SETTINGS["discord_enabled"]"""
+    global discord_thread, discord_state, state_version
     
     with discord_lock:
-        discord_state['enabled'] = enabled
+        discord_state['enabled'] = SETTINGS.get("discord_enabled", False)
+        state_version += 1
     
-    # Only start thread if enabled
-    if enabled and (discord_thread is None or not discord_thread.is_alive()):
+    if discord_thread is None or not discord_thread.is_alive():
+        SETTINGS.subscribe(("discord_enabled",), _on_discord_enabled)
         discord_thread = threading.Thread(
             target=discord_updater_thread,
             args=(interval,),
+            name=TRACKER_NAME,
             daemon=True
         )
         discord_thread.start()
 
 def enable_discord():
     """Enable Discord tracking"""
+    global state_version
     with discord_lock:
-        discord_state['enabled'] = True
+        if not discord_state['enabled']:
+            discord_state['enabled'] = True
+            state_version += 1
 
 def disable_discord():
     """Disable Discord tracking"""
+    global state_version
     with discord_lock:
-        discord_state['enabled'] = False
+        if discord_state['enabled']:
+            discord_state['enabled'] = False
+            state_version += 1
 
 def get_discord_text():
     """Get formatted Discord text for chatbox"""
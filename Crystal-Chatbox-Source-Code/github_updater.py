@@ -2,12 +2,10 @@
 GitHub Auto-Update System
 Checks for new releases and handles updates
 """
-import requests
 import os
 import json
 import logging
 from datetime import datetime, timedelta
-from packaging import version
 
 GITHUB_REPO = "DevSapph1r3/Crystal-Chatbox"  # GitHub repository
 VERSION_FILE = "version.txt"
@@ -76,6 +74,7 @@ def check_for_updates(force=False):
         
         # Get latest release from GitHub API
         url = f"https://api.github.com/repos/{repo}/releases/latest"
+        import requests
         response = requests.get(url, timeout=10)
         
         if response.status_code == 200:
@@ -85,6 +84,7 @@ def check_for_updates(force=False):
             
             # Use proper semantic version comparison
             try:
+                from packaging import version
                 latest_ver = version.parse(latest_version)
                 current_ver = version.parse(current_version)
                 update_available = latest_ver > current_ver
@@ -1,6 +1,5 @@
 import threading
 import time
-import requests
 from settings import SETTINGS
 
 heart_rate_state = {
@@ -10,6 +9,14 @@ heart_rate_state = {
 }
 
 heart_rate_lock = threading.Lock()
+state_version = 0
+
+TRACKER_NAME = "Heart Rate Tracker"
+
+HEART_RATE_KEYS = (
+    "heart_rate_enabled", "heart_rate_source", "heart_rate_pulsoid_token",
+    "heart_rate_hyperate_id", "heart_rate_custom_api"
+)
 
 def get_heart_rate_state():
     with heart_rate_lock:
@@ -23,6 +30,7 @@ def fetch_from_pulsoid():
     
     try:
         headers = {"Authorization": f"Bearer {token}"}
+        import requests
         response = requests.get(
             "https://dev.pulsoid.net/api/v1/data/heart_rate/latest",
             headers=headers,
@@ -46,6 +54,7 @@ def fetch_from_hyperate():
         return None
     
     try:
+        import requests
         response = requests.get(
             f"https://app.hyperate.io/api/v2/live/{session_id}",
             timeout=5
@@ -68,6 +77,7 @@ def fetch_from_custom_api():
         return None
     
     try:
+        import requests
         response = requests.get(api_url, timeout=5)
         
         if response.status_code == 200:
@@ -83,15 +93,14 @@ def fetch_from_custom_api():
 def start_heart_rate_tracker(interval=5):
     """Start heart rate tracking thread"""
     def tracker():
-        global heart_rate_state
+        global heart_rate_state, state_version
         print("[Heart Rate Tracker] Thread started")
         last_error_time = 0
         
         while True:
             try:
-                if not SETTINGS.get("heart_rate_enabled", False):
-                    time.sleep(interval)
-                    continue
+                SETTINGS.wait_until(lambda s: s.get("heart_rate_enabled", False), ("heart_rate_enabled",))
+                seen = SETTINGS.key_version(HEART_RATE_KEYS)
                 
                 bpm = None
                 source = SETTINGS.get("heart_rate_source", "pulsoid")
@@ -104,6 +113,7 @@ def start_heart_rate_tracker(interval=5):
                     bpm = fetch_from_custom_api()
                 
                 with heart_rate_lock:
+                    previous = (heart_rate_state["bpm"], heart_rate_state["is_connected"])
                     if bpm is not None and bpm > 0:
                         heart_rate_state["bpm"] = int(bpm)
                         heart_rate_state["is_connected"] = True
@@ -112,8 +122,11 @@ def start_heart_rate_tracker(interval=5):
                         if heart_rate_state["last_update"] and (time.time() - heart_rate_state["last_update"]) > 30:
                             heart_rate_state["is_connected"] = False
                             heart_rate_state["bpm"] = 0
+                    if (heart_rate_state["bpm"], heart_rate_state["is_connected"]) != previous:
+                        state_version += 1
                 
-                time.sleep(interval)
+                # A new source or token takes effect now rather than after the interval
+                SETTINGS.wait_for_change(HEART_RATE_KEYS, timeout=interval, since=seen)
             except Exception as e:
                 current_time = time.time()
                 if current_time - last_error_time > 60:
@@ -121,4 +134,4 @@ def start_heart_rate_tracker(interval=5):
                     last_error_time = current_time
                 time.sleep(interval)
     
-    threading.Thread(target=tracker, daemon=True).start()
+    threading.Thread(target=tracker, name=TRACKER_NAME, daemon=True).start()
@@ -3,11 +3,17 @@
 Crystal Chatbox Launcher
 Runs Flask app and optionally launches a PyWebview GUI.
 """
-import threading
 import time
+
+LAUNCH_TIME = time.perf_counter()
+
+import threading
 import sys
 import os
 import argparse
+import importlib.util
+import urllib.request
+import urllib.error
 
 try:
     import setproctitle
@@ -15,13 +21,50 @@ try:
 except ImportError:
     pass
 
-try:
-    import webview
-    WEBVIEW_AVAILABLE = True
-except ImportError:
-    WEBVIEW_AVAILABLE = False
+# pywebview is imported by start_gui only, so --nogui/--server never load it
+WEBVIEW_AVAILABLE = importlib.util.find_spec("webview") is not None
+
+FIRST_SEND_TIMEOUT = 30
+READY_TIMEOUT = 30
+READY_POLL_INTERVAL = 0.05
 
-from routes import create_app
+def wait_until_ready(host, port, timeout=READY_TIMEOUT):
+    """Poll /healthz until the server reports ready; returns seconds waited or None"""
+    url = f"http://{host}:{port}/healthz"
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(READY_POLL_INTERVAL)
+    return None
+
+def report_startup(profiler, app_ready_at):
+    """Print import timings and RSS now, and time to first OSC send once it happens"""
+    import routes
+    from startup_profile import rss_mb
+
+    profiler.uninstall()
+    rss = rss_mb()
+    print("[Startup] Import profile:")
+    print(profiler.report())
+    print(f"[Startup] App ready in {(app_ready_at - LAUNCH_TIME) * 1000:.0f} ms, "
+          f"RSS {f'{rss:.1f} MiB' if rss is not None else 'unavailable'}")
+
+    def wait_for_first_send():
+        deadline = time.monotonic() + FIRST_SEND_TIMEOUT
+        while routes.osc_transport.first_send_at is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        first_send = routes.osc_transport.first_send_at
+        if first_send is None:
+            print(f"[Startup] No OSC send within {FIRST_SEND_TIMEOUT}s")
+        else:
+            print(f"[Startup] Cold start to first OSC send: {(first_send - LAUNCH_TIME) * 1000:.0f} ms")
+
+    threading.Thread(target=wait_for_first_send, daemon=True).start()
 
 def start_server(app, host=None, port=5000):
     """Start Flask server"""
@@ -30,6 +73,46 @@ def start_server(app, host=None, port=5000):
     print(f"[Server] Starting Flask server at http://{host}:{port} ...")
     app.run(host=host, port=port, debug=False, use_reloader=False)
 
+def start_production_server(host=None, port=5000, threads=8, profiler=None):
+    """
+    Serve through gunicorn's threaded worker. A single worker owns the OSC
+    queue, rate limiter and trackers (more would each send to VRChat), so
+    concurrency comes from its thread pool. The app is built inside the
+    worker, after the fork, so background services start exactly once.
+    """
+    if host is None:
+        host = os.environ.get("HOST", "0.0.0.0")
+
+    def build_app():
+        from routes import create_app
+        app = create_app()
+        if profiler is not None:
+            report_startup(profiler, time.perf_counter())
+        return app
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        # gunicorn is POSIX-only; Windows installs get the threaded dev server
+        print("[Server] gunicorn not available, falling back to the Flask server")
+        start_server(build_app(), host=host, port=port)
+        return
+
+    class ChatboxServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", 1)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", threads)
+            # /events holds a thread per dashboard; keep-alive comments arrive every 15s
+            self.cfg.set("timeout", 60)
+
+        def load(self):
+            return build_app()
+
+    print(f"[Server] Starting gunicorn at http://{host}:{port} with {threads} threads ...")
+    ChatboxServer().run()
+
 def start_gui(app, host="127.0.0.1", port=5000):
     """Start PyWebview GUI"""
     if not WEBVIEW_AVAILABLE:
@@ -37,11 +120,18 @@ def start_gui(app, host="127.0.0.1", port=5000):
         start_server(app, host=host, port=port)
         return
     
+    import webview
+    
     server_thread = threading.Thread(target=start_server, args=(app, host, port), daemon=True)
     server_thread.start()
 
     print("[GUI] Waiting for server to start...")
-    time.sleep(2)
+    waited = wait_until_ready(host, port)
+    if waited is None:
+        print(f"[GUI] Server not ready after {READY_TIMEOUT}s, opening window anyway")
+    else:
+        print(f"[GUI] Server ready in {waited * 1000:.0f} ms "
+              f"({(time.perf_counter() - LAUNCH_TIME) * 1000:.0f} ms since launch)")
 
     print("[GUI] Launching PyWebview window...")
     window = webview.create_window(
@@ -62,10 +152,35 @@ def start_gui(app, host="127.0.0.1", port=5000):
 def main():
     parser = argparse.ArgumentParser(description="Launch Crystal Chatbox.")
     parser.add_argument("--nogui", action="store_true", help="Run server only, without GUI.")
+    parser.add_argument("--server", action="store_true",
+                        help="Run headless under gunicorn instead of Flask's development server.")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("WEB_THREADS", 8)),
+                        help="Request threads for --server mode (default: 8).")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report per-module import times, RSS and time to the first OSC send.")
+    parser.add_argument("--storage", choices=("json", "sqlite"),
+                        default=os.environ.get("CHATBOX_STORAGE", "json"),
+                        help="Settings/profiles backend; sqlite imports the JSON files on first run (default: json).")
     args = parser.parse_args()
+    # Read by settings.py when routes is imported below
+    os.environ["CHATBOX_STORAGE"] = args.storage
+
+    profiler = None
+    if args.profile_startup:
+        from startup_profile import ImportProfiler
+        profiler = ImportProfiler()
+        profiler.install()
 
-    app = create_app()
     port = int(os.environ.get("PORT", 5000))
+
+    if args.server:
+        start_production_server(port=port, threads=args.threads, profiler=profiler)
+        return
+
+    from routes import create_app
+    app = create_app()
+    if profiler is not None:
+        report_startup(profiler, time.perf_counter())
     
     is_replit = os.environ.get("REPL_ID") or os.environ.get("REPLIT_DB_URL")
     
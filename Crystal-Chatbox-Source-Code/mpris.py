@@ -0,0 +1,201 @@
+"""
+MPRIS Now Playing
+Local, event-driven music state from D-Bus media players on Linux
+"""
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import sys
+import threading
+
+import spotify
+
+logger = logging.getLogger(__name__)
+
+# dbus-next is optional and only useful on Linux desktops with a session bus
+MPRIS_AVAILABLE = sys.platform.startswith("linux") and importlib.util.find_spec("dbus_next") is not None
+
+TRACKER_NAME = "MPRIS Tracker"
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+PREFERRED_PLAYERS = ("spotify",)
+# Players whose Position property is always 0 (Spotify's Linux client among them)
+ZERO_POSITION_PLAYERS = ("spotify",)
+
+
+def _value(metadata, key, default=None):
+    variant = metadata.get(key)
+    return variant.value if variant is not None else default
+
+
+def playback_from_mpris(player, metadata, status, position_us):
+    """Translate MPRIS properties into the current_playback() shape spotify.apply_playback() takes"""
+    if status != "Playing" or not metadata:
+        return None
+    art_url = _value(metadata, "mpris:artUrl", "") or ""
+    album = {"images": []}
+    # file:// covers cannot be fetched by the album art cache; only remote ones are used
+    if art_url.startswith(("http://", "https://")):
+        album = {
+            "id": "mpris-" + hashlib.sha1(art_url.encode("utf-8")).hexdigest()[:20],
+            "images": [{"url": art_url}]
+        }
+    artists = _value(metadata, "xesam:artist", []) or []
+    if isinstance(artists, str):
+        artists = [artists]
+    return {
+        "is_playing": True,
+        "progress_ms": max(0, position_us // 1000),
+        "item": {
+            "id": f"{player}:{_value(metadata, 'mpris:trackid', '') or _value(metadata, 'xesam:title', '')}",
+            "name": _value(metadata, "xesam:title", "Unknown") or "Unknown",
+            "artists": [{"name": artist} for artist in artists],
+            "duration_ms": (_value(metadata, "mpris:length", 0) or 0) // 1000,
+            "album": album
+        }
+    }
+
+
+class MPRISTracker:
+    """
+    Watches every MPRIS player on the session bus. PropertiesChanged (track,
+    play state) and Seeked signals re-read the players at once, so song
+    changes show up without any polling; between events the position is
+    extrapolated by spotify.playback and republished once a second.
+
+    While a player is Playing (spotify's own client first) it owns
+    spotify_state and the Web API tracker stops polling. When no local
+    player is playing, or there is no bus or dbus-next, the Web API
+    tracker carries on as before.
+    """
+
+    def __init__(self, name=TRACKER_NAME):
+        self.name = name
+        self._bus = None
+        self._players = {}
+        self._refresh_pending = False
+        self._thread = None
+
+    def start(self):
+        if not MPRIS_AVAILABLE:
+            return False
+        if self._thread is not None and self._thread.is_alive():
+            return True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        print(f"[{self.name}] Thread started")
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            logger.error(f"MPRIS tracker stopped: {e}")
+        if spotify.local_source is not None:
+            spotify.apply_playback(None)
+            spotify.set_local_source(None)
+
+    async def _main(self):
+        from dbus_next.aio import MessageBus
+        try:
+            self._bus = await MessageBus().connect()
+        except Exception as e:
+            print(f"[MPRIS] No D-Bus session bus ({e}); using the Spotify Web API")
+            return
+
+        introspection = await self._bus.introspect("org.freedesktop.DBus", "/org/freedesktop/DBus")
+        dbus = self._bus.get_proxy_object("org.freedesktop.DBus", "/org/freedesktop/DBus", introspection)
+        daemon = dbus.get_interface("org.freedesktop.DBus")
+        daemon.on_name_owner_changed(self._on_name_owner_changed)
+        for name in await daemon.call_list_names():
+            if name.startswith(MPRIS_PREFIX):
+                await self._attach(name)
+        await self._refresh()
+
+        while True:
+            if spotify.local_source is not None and spotify.playback.is_playing:
+                await asyncio.sleep(spotify.next_second_delay())
+                spotify.advance_position()
+            else:
+                await asyncio.sleep(1)
+
+    async def _attach(self, name):
+        try:
+            introspection = await self._bus.introspect(name, MPRIS_PATH)
+            obj = self._bus.get_proxy_object(name, MPRIS_PATH, introspection)
+            player = obj.get_interface(PLAYER_INTERFACE)
+            properties = obj.get_interface("org.freedesktop.DBus.Properties")
+        except Exception as e:
+            logger.error(f"Could not attach to MPRIS player {name}: {e}")
+            return
+        properties.on_properties_changed(lambda interface, changed, invalidated: self._schedule_refresh())
+        player.on_seeked(lambda position: self._schedule_refresh())
+        self._players[name] = player
+
+    def _on_name_owner_changed(self, name, old_owner, new_owner):
+        if not name.startswith(MPRIS_PREFIX):
+            return
+        if new_owner:
+            asyncio.ensure_future(self._attach_and_refresh(name))
+        else:
+            self._players.pop(name, None)
+            self._schedule_refresh()
+
+    async def _attach_and_refresh(self, name):
+        await self._attach(name)
+        await self._refresh()
+
+    def _schedule_refresh(self):
+        # Players often emit several PropertiesChanged for one track change; coalesce them
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            asyncio.ensure_future(self._refresh())
+
+    async def _status(self, player):
+        try:
+            return await player.get_playback_status()
+        except Exception:
+            return None
+
+    async def _refresh(self):
+        self._refresh_pending = False
+        names = sorted(self._players, key=lambda n: (n[len(MPRIS_PREFIX):].split(".")[0] not in PREFERRED_PLAYERS, n))
+        statuses = await asyncio.gather(*(self._status(self._players[name]) for name in names))
+        playing = next((name for name, status in zip(names, statuses) if status == "Playing"), None)
+
+        if playing is None:
+            if spotify.local_source is not None:
+                spotify.apply_playback(None)
+                spotify.set_local_source(None)
+            return
+
+        player = self._players.get(playing)
+        if player is None:
+            # Exited while its status was being read; NameOwnerChanged schedules another refresh
+            return
+        try:
+            metadata = await player.get_metadata()
+            position = await player.get_position()
+        except Exception as e:
+            logger.error(f"Could not read MPRIS player {playing}: {e}")
+            return
+        source = playing[len(MPRIS_PREFIX):]
+        current = playback_from_mpris(source, metadata, "Playing", position)
+        # For those, keep extrapolating instead of treating 0 as a seek to the start;
+        # any other player reporting 0 on the same track really did restart it
+        if (current and position == 0 and source.split(".")[0] in ZERO_POSITION_PLAYERS
+                and current["item"]["id"] == spotify.playback.track_id):
+            current["progress_ms"] = spotify.playback.position_ms()
+        spotify.set_local_source(source)
+        spotify.apply_playback(current)
+
+
+tracker = MPRISTracker()
+
+
+def start_mpris_tracker():
+    """Start watching local players; returns False where MPRIS is unavailable"""
+    return tracker.start()
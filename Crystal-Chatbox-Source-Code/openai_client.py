@@ -4,16 +4,14 @@ Generates creative custom messages for VRChat chatbox
 """
 import os
 import logging
+import importlib.util
 from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
-# Will be set when OpenAI API key is available
-openai_available = False
-try:
-    import openai
-    openai_available = True
-except ImportError:
+# The openai package is only imported when a message is generated
+openai_available = importlib.util.find_spec("openai") is not None
+if not openai_available:
     logger.warning("OpenAI not available - install with: pip install openai")
 
 MOODS = {
@@ -62,6 +60,7 @@ Requirements:
 
 Message:"""
         
+        import openai
         client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
         
         response = client.chat.completions.create(
@@ -0,0 +1,94 @@
+"""
+OSC Datagram Encoding
+Caches encoded OSC datagrams so re-sends are a single raw socket write
+"""
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+CHATBOX_INPUT = "/chatbox/input"
+CHATBOX_VISIBLE = "/chatbox/visible"
+
+# Pinned constants plus a few recent payloads (the last composed chatbox
+# message and anything re-sent alongside it).
+RECENT_CACHE_SIZE = 8
+
+
+def _normalize(value):
+    if value is None:
+        return ()
+    if not isinstance(value, Iterable) or isinstance(value, (str, bytes)):
+        return (value,)
+    return tuple(value)
+
+
+def build_datagram(address, value):
+    """Encode without caching, same argument handling as SimpleUDPClient"""
+    builder = OscMessageBuilder(address=address)
+    for val in _normalize(value):
+        builder.add_arg(val)
+    return builder.build().dgram
+
+
+class DatagramCache:
+    """Thread-safe encoder keyed on address and typed arguments"""
+
+    def __init__(self, size=RECENT_CACHE_SIZE):
+        self._size = size
+        self._lock = threading.Lock()
+        self._pinned = {}
+        self._recent = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(address, values):
+        # 1 and True hash alike but encode differently ('i' vs 'T')
+        return (address, tuple((type(v), v) for v in values))
+
+    def pin(self, address, value):
+        values = _normalize(value)
+        dgram = build_datagram(address, values)
+        with self._lock:
+            self._pinned[self._key(address, values)] = dgram
+        return dgram
+
+    def encode(self, address, value):
+        values = _normalize(value)
+        key = self._key(address, values)
+        with self._lock:
+            dgram = self._pinned.get(key)
+            if dgram is None:
+                dgram = self._recent.get(key)
+                if dgram is not None:
+                    self._recent.move_to_end(key)
+            if dgram is not None:
+                self.hits += 1
+                return dgram
+            self.misses += 1
+
+        dgram = build_datagram(address, values)
+        with self._lock:
+            self._recent[key] = dgram
+            while len(self._recent) > self._size:
+                self._recent.popitem(last=False)
+        return dgram
+
+    def get_stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached": len(self._pinned) + len(self._recent)}
+
+
+datagram_cache = DatagramCache()
+VISIBLE_ON = datagram_cache.pin(CHATBOX_VISIBLE, 1)
+VISIBLE_OFF = datagram_cache.pin(CHATBOX_VISIBLE, 0)
+
+
+def encode(address, value):
+    return datagram_cache.encode(address, value)
+
+
+def encode_chatbox(message, notify=True):
+    return datagram_cache.encode(CHATBOX_INPUT, [message, notify])
@@ -0,0 +1,151 @@
+"""
+OSC Chatbox Sender
+Priority send queue with a token-bucket rate limiter matched to VRChat's chatbox
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# VRChat throttles /chatbox/input: short bursts are accepted, sustained sends
+# faster than roughly one every 1.5 seconds get dropped on the client side.
+CHATBOX_BURST = 3
+CHATBOX_REFILL_SECONDS = 1.5
+
+PRIORITY_MANUAL = 0
+PRIORITY_ROTATION = 1
+
+MAX_TICKETS = 256
+
+
+class TokenBucket:
+    """Classic token bucket; not thread-safe, guarded by the sender's lock"""
+
+    def __init__(self, capacity=CHATBOX_BURST, refill_seconds=CHATBOX_REFILL_SECONDS):
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) / self.refill_seconds)
+        self._updated = now
+
+    def time_until_token(self):
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.refill_seconds
+
+    def consume(self):
+        self._refill()
+        self.tokens -= 1
+
+
+class OSCSender:
+    """
+    Dedicated sender thread. Messages are queued with a priority and a ticket
+    whose state can be polled: queued -> sending -> sent | failed, or
+    coalesced when a newer rotation message replaced it before delivery.
+    """
+
+    def __init__(self, deliver, bucket=None, name="OSC Sender"):
+        self.name = name
+        self._deliver = deliver
+        self._bucket = bucket or TokenBucket()
+        self._queue = []
+        self._tickets = OrderedDict()
+        self._counter = itertools.count(1)
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, message, priority=PRIORITY_ROTATION):
+        """Queue a message and return its ticket id"""
+        with self._cond:
+            if priority == PRIORITY_ROTATION:
+                for ticket in self._tickets.values():
+                    if ticket["state"] == "queued" and ticket["priority"] == PRIORITY_ROTATION:
+                        ticket["state"] = "coalesced"
+
+            ticket_id = next(self._counter)
+            self._tickets[ticket_id] = {
+                "id": ticket_id,
+                "state": "queued",
+                "priority": priority,
+                "message": message,
+                "queued_at": time.time(),
+                "sent_at": None
+            }
+            heapq.heappush(self._queue, (priority, ticket_id))
+            self._prune()
+            self._cond.notify()
+        return ticket_id
+
+    def get_ticket(self, ticket_id):
+        with self._cond:
+            ticket = self._tickets.get(ticket_id)
+            return dict(ticket) if ticket else None
+
+    def pending_count(self):
+        with self._cond:
+            return sum(1 for t in self._tickets.values() if t["state"] == "queued")
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _prune(self):
+        while len(self._tickets) > MAX_TICKETS:
+            oldest_id, oldest = next(iter(self._tickets.items()))
+            if oldest["state"] in ("queued", "sending"):
+                break
+            del self._tickets[oldest_id]
+
+    def _next_queued(self):
+        while self._queue:
+            _, ticket_id = self._queue[0]
+            ticket = self._tickets.get(ticket_id)
+            if ticket is not None and ticket["state"] == "queued":
+                return ticket
+            heapq.heappop(self._queue)
+        return None
+
+    def _take(self):
+        with self._cond:
+            while True:
+                ticket = self._next_queued()
+                if ticket is None:
+                    self._cond.wait()
+                    continue
+                wait = self._bucket.time_until_token()
+                if wait > 0:
+                    # Re-evaluate after waking: a higher priority message may
+                    # have arrived, or this one may have been coalesced.
+                    self._cond.wait(wait)
+                    continue
+                self._bucket.consume()
+                heapq.heappop(self._queue)
+                ticket["state"] = "sending"
+                return ticket
+
+    def _run(self):
+        print(f"[{self.name}] Thread started")
+        while True:
+            ticket = self._take()
+            try:
+                ok = self._deliver(ticket["message"])
+            except Exception as e:
+                logger.error(f"OSC delivery failed: {e}")
+                ok = False
+            with self._cond:
+                ticket["state"] = "sent" if ok else "failed"
+                ticket["sent_at"] = time.time() if ok else None
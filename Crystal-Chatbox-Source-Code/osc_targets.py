@@ -0,0 +1,97 @@
+"""
+OSC Targets
+Endpoint list and per-target health counters for the OSC transport
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class OSCTarget:
+    """One OSC endpoint; its datagram transport is owned by AsyncOSCTransport"""
+
+    def __init__(self, name, ip, port):
+        self.name = name
+        self.ip = ip
+        self.port = int(port)
+        self.transport = None
+        self.sends = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_latency_ms = None
+        self.last_error = ""
+        self.last_success = None
+        self._lock = threading.Lock()
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+
+    def send(self, dgram):
+        """Write an encoded datagram on the loop thread, returning True on success"""
+        if self.transport is None or self.transport.is_closing():
+            self.record_failure("endpoint not open")
+            return False
+        start = time.perf_counter()
+        try:
+            self.transport.sendto(dgram)
+        except Exception as e:
+            self.record_failure(e)
+            logger.error(f"OSC send to {self.name} ({self.ip}:{self.port}) failed: {e}")
+            return False
+        latency = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.sends += 1
+            self.consecutive_failures = 0
+            self.last_latency_ms = round(latency, 3)
+            self.last_error = ""
+            self.last_success = time.time()
+        return True
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    def get_stats(self):
+        with self._lock:
+            if self.consecutive_failures == 0:
+                health = "ok" if self.sends else "idle"
+            else:
+                health = "failing"
+            return {
+                "name": self.name,
+                "ip": self.ip,
+                "port": self.port,
+                "health": health,
+                "sends": self.sends,
+                "failures": self.failures,
+                "last_latency_ms": self.last_latency_ms,
+                "last_error": self.last_error
+            }
+
+
+def targets_from_settings(settings):
+    """Primary quest_ip/quest_port target followed by enabled osc_targets mirrors"""
+    targets = [OSCTarget(
+        "Primary",
+        settings.get("quest_ip", "") or "127.0.0.1",
+        settings.get("quest_port", 9000)
+    )]
+    for idx, entry in enumerate(settings.get("osc_targets", [])):
+        if not isinstance(entry, dict) or not entry.get("ip") or not entry.get("enabled", True):
+            continue
+        try:
+            targets.append(OSCTarget(
+                entry.get("name") or f"Mirror {idx + 1}",
+                entry["ip"],
+                entry.get("port", 9000)
+            ))
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid OSC target {entry}: {e}")
+    return targets
+
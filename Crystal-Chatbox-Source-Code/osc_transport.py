@@ -0,0 +1,140 @@
+"""
+Async OSC Transport
+asyncio datagram endpoints for every OSC target, owned by one event loop thread
+"""
+import asyncio
+import logging
+import threading
+import time
+
+import osc_encoding
+
+logger = logging.getLogger(__name__)
+
+SEND_TIMEOUT = 2.0
+CONFIGURE_TIMEOUT = 10.0
+
+
+class _TargetProtocol(asyncio.DatagramProtocol):
+    def __init__(self, owner, target):
+        self.owner = owner
+        self.target = target
+
+    def error_received(self, exc):
+        # ICMP errors (e.g. port unreachable) surface asynchronously here
+        self.owner._report_error(self.target, exc)
+
+    def connection_lost(self, exc):
+        if exc is not None:
+            self.owner._report_error(self.target, exc)
+
+
+class AsyncOSCTransport:
+    """
+    Owns the UDP sockets for all OSC targets. The target list is only ever
+    replaced on the loop thread, so a reconfigure is atomic with respect to
+    sends: a datagram goes either to the old targets or to the new ones.
+
+    Coroutines (configure, send, send_message_async, send_chatbox_async,
+    send_visible_async) are the primary API; submit() schedules one from any
+    thread and returns a concurrent.futures.Future. The blocking helpers at
+    the bottom (send_chatbox, send_visible, ...) keep the old
+    SimpleUDPClient-style call sites working.
+    """
+
+    def __init__(self, on_error=None, name="OSC Transport"):
+        self.name = name
+        self._on_error = on_error
+        self._loop = None
+        self._thread = None
+        self._targets = []
+        self._start_lock = threading.Lock()
+        self.first_send_at = None
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                print(f"[{self.name}] Event loop started")
+                loop.run_forever()
+
+            self._loop = loop
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+
+    def submit(self, coro):
+        """Run a coroutine on the transport loop from any thread"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _report_error(self, target, exc):
+        target.record_failure(exc)
+        logger.error(f"OSC target {target.name} ({target.ip}:{target.port}) error: {exc}")
+        if self._on_error:
+            try:
+                self._on_error(target, exc)
+            except Exception as e:
+                logger.error(f"OSC error callback failed: {e}")
+
+    async def _open(self, target):
+        try:
+            transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: _TargetProtocol(self, target),
+                remote_addr=(target.ip, target.port)
+            )
+            target.transport = transport
+        except Exception as e:
+            self._report_error(target, e)
+
+    async def configure(self, targets):
+        """Open endpoints for the new targets, then swap them in and close the old ones"""
+        targets = list(targets)
+        await asyncio.gather(*(self._open(target) for target in targets))
+        old_targets, self._targets = self._targets, targets
+        for target in old_targets:
+            target.close()
+        return [target.get_stats() for target in targets]
+
+    async def send(self, dgram):
+        """Write a datagram to every target; raises if all of them failed"""
+        targets = self._targets
+        results = [target.send(dgram) for target in targets]
+        if self.first_send_at is None and any(results):
+            self.first_send_at = time.perf_counter()
+        if targets and not any(results):
+            errors = "; ".join(f"{t.name}: {t.last_error}" for t in targets)
+            raise OSError(f"All OSC targets failed ({errors})")
+        return results
+
+    async def send_message_async(self, address, value):
+        return await self.send(osc_encoding.encode(address, value))
+
+    async def send_chatbox_async(self, message):
+        return await self.send(osc_encoding.encode_chatbox(message))
+
+    async def send_visible_async(self, visible):
+        return await self.send(osc_encoding.VISIBLE_ON if visible else osc_encoding.VISIBLE_OFF)
+
+    def get_stats(self):
+        return [target.get_stats() for target in self._targets]
+
+    # Blocking helpers for threads (scheduler, sender, Flask handlers)
+
+    def reconfigure(self, targets):
+        return self.submit(self.configure(targets)).result(CONFIGURE_TIMEOUT)
+
+    def send_message(self, address, value):
+        return self.submit(self.send_message_async(address, value)).result(SEND_TIMEOUT)
+
+    def send_chatbox(self, message):
+        return self.submit(self.send_chatbox_async(message)).result(SEND_TIMEOUT)
+
+    def send_visible(self, visible):
+        return self.submit(self.send_visible_async(visible)).result(SEND_TIMEOUT)
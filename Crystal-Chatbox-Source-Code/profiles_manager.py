@@ -2,12 +2,16 @@
 Profiles/Presets Manager
 Save and load different chatbox configurations
 """
+import copy
 import json
 import os
 import logging
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from settings import atomic_write_text, settings_db
+
 logger = logging.getLogger(__name__)
 
 PROFILES_FILE = "profiles.json"
@@ -34,80 +38,154 @@ DEFAULT_PROFILE = {
     }
 }
 
+class ProfileStore:
+    """
+    Profiles indexed by name in memory. The file is re-parsed only when its
+    mtime or size changed since the last load or write (e.g. edited by hand
+    or by another process), and every write goes through a temp file and
+    os.replace. Profiles are deep-copied on the way in and out so callers
+    never alias the cached dicts.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._profiles: Dict[str, Dict] = {}
+        self._stamp = None
+        self._lock = threading.RLock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        profiles = []
+        if stamp is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    profiles = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading profiles: {e}")
+        self._profiles = {p.get('name', 'Unnamed'): p for p in profiles if isinstance(p, dict)}
+        self._stamp = stamp
+
+    def _save(self) -> bool:
+        try:
+            atomic_write_text(self.path, json.dumps(list(self._profiles.values()), indent=4))
+        except Exception as e:
+            logger.error(f"Error saving profiles: {e}")
+            self._stamp = None  # Force a reload so memory matches the file again
+            return False
+        self._stamp = self._file_stamp()
+        return True
+
+    def all(self) -> List[Dict]:
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(list(self._profiles.values()))
+
+    def names(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return list(self._profiles)
+
+    def get(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            self._refresh()
+            profile = self._profiles.get(name)
+            return copy.deepcopy(profile) if profile is not None else None
+
+    def put(self, profile: Dict, create_only=False, update_only=False) -> bool:
+        with self._lock:
+            self._refresh()
+            name = profile['name']
+            exists = name in self._profiles
+            if (create_only and exists) or (update_only and not exists):
+                return False
+            previous = self._profiles.get(name)
+            self._profiles[name] = copy.deepcopy(profile)
+            if self._save():
+                return True
+            if previous is None:
+                self._profiles.pop(name, None)
+            else:
+                self._profiles[name] = previous
+            return False
+
+    def update(self, name: str, **fields) -> bool:
+        with self._lock:
+            self._refresh()
+            if name not in self._profiles:
+                return False
+            merged = dict(self._profiles[name], **copy.deepcopy(fields))
+            return self.put(merged, update_only=True)
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            self._refresh()
+            previous = self._profiles.pop(name, None)
+            if self._save():
+                return True
+            if previous is not None:
+                self._profiles[name] = previous
+            return False
+
+    def replace_all(self, profiles: List[Dict]) -> bool:
+        with self._lock:
+            self._profiles = {p.get('name', 'Unnamed'): copy.deepcopy(p) for p in profiles}
+            return self._save()
+
+def _profile_rows(profiles):
+    return (("profiles", p.get('name', 'Unnamed'), json.dumps(p)) for p in profiles if isinstance(p, dict))
+
+if settings_db is not None:
+    from storage import ProfileTable
+    settings_db.migrate_json("profiles", PROFILES_FILE, _profile_rows)
+    _store = ProfileTable(settings_db)
+else:
+    _store = ProfileStore(PROFILES_FILE)
+
 def load_profiles() -> List[Dict]:
     """Load all saved profiles"""
-    try:
-        if os.path.exists(PROFILES_FILE):
-            with open(PROFILES_FILE, 'r') as f:
-                return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading profiles: {e}")
-    
-    return []
+    return _store.all()
 
 def save_profiles(profiles: List[Dict]) -> bool:
     """Save profiles to file"""
-    try:
-        with open(PROFILES_FILE, 'w') as f:
-            json.dump(profiles, f, indent=4)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving profiles: {e}")
-        return False
+    return _store.replace_all(profiles)
 
 def get_profile(profile_name: str) -> Optional[Dict]:
     """Get a specific profile by name"""
-    profiles = load_profiles()
-    for profile in profiles:
-        if profile.get('name') == profile_name:
-            return profile
-    return None
+    return _store.get(profile_name)
 
 def create_profile(name: str, settings: Dict) -> bool:
     """Create a new profile"""
-    profiles = load_profiles()
-    
-    # Check if profile already exists
-    for profile in profiles:
-        if profile.get('name') == name:
-            return False  # Profile already exists
-    
     new_profile = {
         "name": name,
         "created_at": datetime.now().isoformat(),
         "settings": settings
     }
-    
-    profiles.append(new_profile)
-    return save_profiles(profiles)
+    return _store.put(new_profile, create_only=True)
 
 def update_profile(name: str, settings: Dict) -> bool:
     """Update an existing profile"""
-    profiles = load_profiles()
-    
-    for profile in profiles:
-        if profile.get('name') == name:
-            profile['settings'] = settings
-            profile['updated_at'] = datetime.now().isoformat()
-            return save_profiles(profiles)
-    
-    return False
+    return _store.update(name, settings=settings, updated_at=datetime.now().isoformat())
 
 def delete_profile(name: str) -> bool:
     """Delete a profile"""
-    profiles = load_profiles()
-    
     # Don't allow deleting the default profile
     if name.lower() == "default":
         return False
     
-    profiles = [p for p in profiles if p.get('name') != name]
-    return save_profiles(profiles)
+    return _store.delete(name)
 
 def list_profiles() -> List[str]:
     """Get list of profile names"""
-    profiles = load_profiles()
-    return [p.get('name', 'Unnamed') for p in profiles]
+    return _store.names()
 
 def export_profile(name: str) -> Optional[str]:
     """Export a profile as JSON string"""
@@ -125,19 +203,8 @@ def import_profile(profile_json: str) -> bool:
         if 'name' not in profile_data or 'settings' not in profile_data:
             return False
         
-        profiles = load_profiles()
-        
-        # Check for duplicate names
-        name = profile_data['name']
-        for i, profile in enumerate(profiles):
-            if profile.get('name') == name:
-                # Replace existing
-                profiles[i] = profile_data
-                return save_profiles(profiles)
-        
-        # Add new profile
-        profiles.append(profile_data)
-        return save_profiles(profiles)
+        # Replaces an existing profile with the same name
+        return _store.put(profile_data)
         
     except Exception as e:
         logger.error(f"Error importing profile: {e}")
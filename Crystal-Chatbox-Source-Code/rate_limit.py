@@ -0,0 +1,143 @@
+"""
+Rate Limiting
+Per-provider request budgets with exponential backoff, jitter and Retry-After
+"""
+import random
+import threading
+import time
+
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 300.0
+
+
+class RequestBudget:
+    """
+    Token bucket (rate requests per second, up to burst at once) plus an
+    error backoff. After n consecutive failures the next request waits a
+    random time in [0, min(max_backoff, base * 2**n)] ("full jitter"), and
+    always at least the server's Retry-After when it sent one, even past
+    max_backoff. A success resets the backoff; tokens still limit how fast
+    the caller can go.
+    """
+
+    def __init__(self, name, rate=1.0, burst=5, base=BACKOFF_BASE, max_backoff=BACKOFF_MAX):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.base = base
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._blocked_until = 0.0
+        self.failures = 0
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "throttled": 0,
+            "last_error": "",
+            "last_status": None,
+            "retry_after": None
+        }
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def delay(self):
+        """Seconds to wait before the next request is allowed (0 if it may go now)"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            token_wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            return max(token_wait, self._blocked_until - now, 0.0)
+
+    def acquire(self):
+        """Take a token if the budget allows a request now; returns False otherwise"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until or self._tokens < 1:
+                self.stats["throttled"] += 1
+                return False
+            self._tokens -= 1
+            self.stats["requests"] += 1
+            return True
+
+    def wait(self):
+        """Block until a request is allowed, then take its token"""
+        while not self.acquire():
+            time.sleep(max(self.delay(), 0.01))
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._blocked_until = 0.0
+            self.stats["retry_after"] = None
+
+    def failure(self, error="", status=None, retry_after=None):
+        """Record a failed request and return the backoff delay in seconds"""
+        with self._lock:
+            self.failures += 1
+            ceiling = min(self.max_backoff, self.base * 2 ** self.failures)
+            delay = random.uniform(0, ceiling)
+            if retry_after is not None:
+                # max_backoff bounds our own guess, never the server's explicit instruction
+                delay = max(delay, retry_after)
+            self._blocked_until = time.monotonic() + delay
+            self.stats["errors"] += 1
+            self.stats["last_error"] = str(error)
+            self.stats["last_status"] = status
+            self.stats["retry_after"] = retry_after
+            return delay
+
+    def reset(self):
+        """Forget past errors, e.g. after new credentials were entered"""
+        with self._lock:
+            self.failures = 0
+            self._blocked_until = 0.0
+            self._tokens = float(self.burst)
+
+    def get_state(self):
+        with self._lock:
+            remaining = max(0.0, self._blocked_until - time.monotonic())
+            state = dict(self.stats)
+            state["failures"] = self.failures
+        state["state"] = "backoff" if remaining > 0 else "ok"
+        # Whole seconds so the status feed only changes once a second
+        state["retry_in"] = int(remaining + 0.999) if remaining > 0 else 0
+        return state
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+_budgets = {}
+_budgets_lock = threading.Lock()
+
+
+def get_budget(name, **kwargs):
+    """The shared budget for a provider, created with kwargs on first use"""
+    with _budgets_lock:
+        if name not in _budgets:
+            _budgets[name] = RequestBudget(name, **kwargs)
+        return _budgets[name]
+
+
+def get_states():
+    with _budgets_lock:
+        budgets = list(_budgets.values())
+    return {budget.name: budget.get_state() for budget in budgets}
@@ -1,17 +1,26 @@
+import copy
+import json
 import threading
 import time
-import json
 import os
 import random
+import math
 import logging
 from datetime import datetime
-import pytz
-
-from flask import Flask, render_template, request, jsonify, redirect, send_file
-from pythonosc.udp_client import SimpleUDPClient
 
-from settings import SETTINGS 
+from flask import Flask, Response, render_template, request, jsonify, redirect, send_file
+
+from settings import SETTINGS, settings_db, settings_writer, validate_setting
+from scheduler import DeadlineScheduler, next_deadline
+from change_detector import ChangeDetector
+from osc_sender import OSCSender, PRIORITY_MANUAL, PRIORITY_ROTATION
+from osc_targets import targets_from_settings
+from osc_transport import AsyncOSCTransport
+from status_feed import StatusFeed, format_event
+import rate_limit
+from album_art import cache as album_art_cache
 import spotify
+import mpris
 import window_tracker
 import heart_rate_monitor
 import github_updater
@@ -20,8 +29,9 @@ import weather_service
 import profiles_manager
 import text_effects
 import discord_rpc
+import variables
+import clock
 
-SETTINGS_FILE = "settings.json"
 ERROR_LOG_FILE = "vrchat_errors.log"
 
 logging.basicConfig(
@@ -49,23 +59,16 @@ if SETTINGS.get("heart_rate_enabled", False) and not show_heartrate:
     settings_changed = True
 
 if settings_changed:
-    try:
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
-    except Exception as e:
-        print(f"[Startup] Failed to sync settings: {e}")
+    settings_writer.save()
 
 auto_send_paused = False
 connection_status = "disconnected"
 last_successful_send = None
-last_osc_send_time = 0
 
 current_time_text = ""
 current_custom_text = SETTINGS.get("custom_texts", ["Custom Message Test"])[0]
 last_message_sent = ""
 text_cycle_index = 0
-next_custom_in = SETTINGS.get("osc_send_interval", 3)
-per_message_timers = {}
 message_queue = []
 
 CUSTOM_TEXTS = SETTINGS.get("custom_texts", [])
@@ -77,7 +80,7 @@ PROGRESS_STYLE = SETTINGS.get("progress_style", "bar")
 LAYOUT_ORDER = SETTINGS.get("layout_order", ["time","custom","song","window","heartrate"])
 
 current_custom_text = CUSTOM_TEXTS[0] if CUSTOM_TEXTS else "Custom Message Test"
-current_time_text = datetime.now().strftime("%I:%M %p").lstrip("0")
+current_time_text = clock.time_text(TIMEZONE)
 
 def log_error(message, exception=None):
     if SETTINGS.get("error_log_enabled", True):
@@ -86,34 +89,32 @@ def log_error(message, exception=None):
         else:
             logging.error(message)
 
-def make_client():
-    ip = SETTINGS.get("quest_ip", "") or "127.0.0.1"
-    port = int(SETTINGS.get("quest_port", 9000))
-    return SimpleUDPClient(ip, port)
+def on_osc_error(target, exc):
+    """Called from the transport loop when a target reports a socket error"""
+    global connection_status
+    log_error(f"OSC target {target.name} ({target.ip}:{target.port}) error", exc)
+    if all(t["health"] == "failing" for t in osc_transport.get_stats()):
+        connection_status = "disconnected"
+
+osc_transport = AsyncOSCTransport(on_error=on_osc_error)
+
+def reconfigure_osc_targets():
+    """Swap in OSC targets after quest_ip, quest_port or osc_targets changed"""
+    osc_transport.reconfigure(targets_from_settings(SETTINGS))
+    change_detector.reset()
+
+OSC_TARGET_KEYS = ("quest_ip", "quest_port", "osc_targets")
 
-client = make_client()
+def on_osc_settings_changed(key, value):
+    print(f"[Auto-Reconnect] OSC targets changed, now sending to {SETTINGS.get('quest_ip', '')} and {len(SETTINGS.get('osc_targets', []))} mirror(s)")
+    reconfigure_osc_targets()
+
+scheduler = DeadlineScheduler(name="VRChat Updater")
+change_detector = ChangeDetector()
 
 def replace_variables(text):
-    """Replace variable tags like {song} and {time} in messages"""
-    if not text:
-        return text
-    
-    result = text
-    
-    tz_setting = SETTINGS.get("timezone", "local")
-    if tz_setting == "local":
-        now = datetime.now()
-    else:
-        now = datetime.now(pytz.timezone(str(tz_setting)))
-    time_str = now.strftime("%I:%M %p").lstrip("0")
-    
-    sstate = spotify.get_spotify_state()
-    song_str = sstate.get("song_text", "No song playing")
-    
-    result = result.replace("{time}", time_str)
-    result = result.replace("{song}", song_str)
-    
-    return result
+    """Replace variable tags like {song} and {time:Asia/Tokyo} in messages"""
+    return variables.expand(text)
 
 def get_next_custom_message():
     """Get next custom message based on random/weighted settings"""
@@ -158,121 +159,374 @@ def update_message_queue():
             msg = CUSTOM_TEXTS[next_idx]
             message_queue.append(msg[:30] + "..." if len(msg) > 30 else msg)
 
-def get_current_preview():
-    global current_time_text, current_custom_text
-    
-    if show_time:
-        tz_setting = SETTINGS.get("timezone", "local")
-        if tz_setting == "local":
-            now = datetime.now()
-        else:
-            now = datetime.now(pytz.timezone(str(tz_setting)))
-        current_time_text = now.strftime("%I:%M %p").lstrip("0")
-    else:
-        current_time_text = ""
-
-    sstate = spotify.get_spotify_state()
-    song_line = ""
-    if show_music and sstate.get("song_text"):
-        pos = int(sstate.get("song_pos", 0))
-        dur = int(sstate.get("song_dur", 0))
-        elapsed_min, elapsed_sec = divmod(pos, 60)
-        total_min, total_sec = divmod(dur, 60)
-        show_icons = SETTINGS.get("show_module_icons", True)
-        song_emoji = SETTINGS.get("song_emoji", "🎶")
-        icon = f"{song_emoji} " if show_icons and song_emoji else ""
-        song_line = f"{icon}{sstate['song_text']} [{elapsed_min}:{elapsed_sec:02d} / {total_min}:{total_sec:02d}]"
+def format_progress(style, progress_percent):
+    """Render a 0-100 progress value in the configured progress_style"""
+    if style == "bar":
+        filled = int(progress_percent / 10)
+        return "█" * filled + "░" * (10 - filled)
+    if style == "dots":
+        filled = int(progress_percent / 10)
+        return "●" * filled + "○" * (10 - filled)
+    if style == "percentage":
+        return f"{progress_percent}%"
+    return ""
+
+def format_song_line(sstate, prefix=""):
+    pos = int(sstate.get("song_pos", 0))
+    dur = int(sstate.get("song_dur", 0))
+    elapsed_min, elapsed_sec = divmod(pos, 60)
+    total_min, total_sec = divmod(dur, 60)
+    return f"{prefix}{sstate['song_text']} [{elapsed_min}:{elapsed_sec:02d} / {total_min}:{total_sec:02d}]"
+
+def get_progress_percent(sstate):
+    dur = int(sstate.get("song_dur", 0))
+    if dur <= 0:
+        return 0
+    return int((int(sstate.get("song_pos", 0)) / dur) * 100)
+
+class RenderPlan:
+    """
+    Layout, icons, progress style and text effect compiled into a list of
+    (module, segment) pairs. Each segment takes a per-render context dict and
+    returns its line or an empty string.
+    """
+
+    def __init__(self, segments, clock, text_effect):
+        self.segments = segments
+        self.clock = clock
+        self.text_effect = text_effect
+
+def icon_prefix(show_icons, emoji_key, default):
+    emoji = SETTINGS.get(emoji_key, default)
+    return f"{emoji} " if show_icons and emoji else ""
+
+def build_render_plan():
+    show_icons = SETTINGS.get("show_module_icons", True)
+    segments = []
 
-    wstate = window_tracker.get_window_state()
-    window_line = ""
-    if show_window and wstate.get("app_name"):
-        show_icons = SETTINGS.get("show_module_icons", True)
-        window_emoji = SETTINGS.get("window_emoji", "💻")
-        icon = f"{window_emoji} " if show_icons and window_emoji else ""
-        window_line = f"{icon}{wstate['app_name']}"
+    plan_clock = clock.get_clock(SETTINGS.get("timezone", "local"))
 
-    hrstate = heart_rate_monitor.get_heart_rate_state()
-    heartrate_line = ""
-    if show_heartrate and hrstate.get("is_connected") and hrstate.get("bpm", 0) > 0:
-        show_icons = SETTINGS.get("show_module_icons", True)
-        heartrate_emoji = SETTINGS.get("heartrate_emoji", "❤️")
-        icon = f"{heartrate_emoji} " if show_icons and heartrate_emoji else ""
-        heartrate_line = f"{icon}{hrstate['bpm']} BPM"
-
-    weather_line = ""
-    if show_weather:
-        weather_text = weather_service.get_weather_text()
-        if weather_text:
-            weather_line = weather_text
+    def spotify_state(ctx):
+        if "spotify" not in ctx:
+            ctx["spotify"] = spotify.get_spotify_state()
+        return ctx["spotify"]
 
-    show_icons = SETTINGS.get("show_module_icons", True)
-    lines = []
     layout = SETTINGS.get("layout_order", ["time","custom","song","window","heartrate","weather"])
     for part in layout:
-        if part == "time" and current_time_text:
-            time_emoji = SETTINGS.get("time_emoji", "⏰")
-            icon = f"{time_emoji} " if show_icons and time_emoji else ""
-            lines.append(f"{icon}{current_time_text}")
-        elif part == "custom" and current_custom_text:
-            processed_text = replace_variables(current_custom_text)
-            lines.append(processed_text)
-        elif part == "song" and song_line:
-            lines.append(song_line)
-        
+        if part == "time" and show_time:
+            time_prefix = icon_prefix(show_icons, "time_emoji", "⏰")
+            segments.append(("time", lambda ctx, p=time_prefix: f"{p}{current_time_text}" if current_time_text else ""))
+        elif part == "custom":
+            segments.append(("custom", lambda ctx: replace_variables(current_custom_text) if current_custom_text else ""))
+        elif part == "song" and show_music:
+            song_prefix = icon_prefix(show_icons, "song_emoji", "🎶")
+
+            def render_song(ctx, p=song_prefix):
+                sstate = spotify_state(ctx)
+                return format_song_line(sstate, p) if sstate.get("song_text") else ""
+            segments.append(("song", render_song))
+
             if SETTINGS.get("music_progress", True):
                 style = SETTINGS.get("progress_style", "bar")
-                progress_percent = 0
-                dur = int(sstate.get("song_dur", 0))
-                pos = int(sstate.get("song_pos", 0))
-                if dur > 0:
-                    progress_percent = int((pos / dur) * 100)
-                progress_str = ""
-                if style == "bar":
-                    filled = int(progress_percent / 10)
-                    empty = 10 - filled
-                    progress_str = "█" * filled + "░" * empty
-                elif style == "dots":
-                    filled = int(progress_percent / 10)
-                    empty = 10 - filled
-                    progress_str = "●" * filled + "○" * empty
-                elif style == "percentage":
-                    progress_str = f"{progress_percent}%"
-                if progress_str:
-                    lines.append(progress_str)
-        elif part == "window" and window_line:
-            lines.append(window_line)
-        elif part == "heartrate" and heartrate_line:
-            lines.append(heartrate_line)
-        elif part == "weather" and weather_line:
-            lines.append(weather_line)
+
+                def render_progress(ctx, style=style):
+                    sstate = spotify_state(ctx)
+                    if not sstate.get("song_text"):
+                        return ""
+                    return format_progress(style, get_progress_percent(sstate))
+                segments.append(("progress", render_progress))
+        elif part == "window" and show_window:
+            window_prefix = icon_prefix(show_icons, "window_emoji", "💻")
+
+            def render_window(ctx, p=window_prefix):
+                app_name = window_tracker.get_window_state().get("app_name")
+                return f"{p}{app_name}" if app_name else ""
+            segments.append(("window", render_window))
+        elif part == "heartrate" and show_heartrate:
+            heartrate_prefix = icon_prefix(show_icons, "heartrate_emoji", "❤️")
+
+            def render_heartrate(ctx, p=heartrate_prefix):
+                hrstate = heart_rate_monitor.get_heart_rate_state()
+                if hrstate.get("is_connected") and hrstate.get("bpm", 0) > 0:
+                    return f"{p}{hrstate['bpm']} BPM"
+                return ""
+            segments.append(("heartrate", render_heartrate))
+        elif part == "weather" and show_weather:
+            segments.append(("weather", lambda ctx: weather_service.get_weather_text() or ""))
+
+    text_effect = SETTINGS.get("text_effect", "none")
+    if text_effect == "none":
+        text_effect = None
+    return RenderPlan(segments, plan_clock, text_effect)
+
+render_plan = None
+render_plan_key = None
+render_plan_lock = threading.Lock()
+
+def get_render_plan():
+    """Return the compiled plan, rebuilding it only when settings changed"""
+    global render_plan, render_plan_key
+    key = (SETTINGS.version, show_time, show_music, show_window, show_heartrate, show_weather)
+    if render_plan is None or render_plan_key != key:
+        with render_plan_lock:
+            if render_plan is None or render_plan_key != key:
+                render_plan = build_render_plan()
+                render_plan_key = key
+    return render_plan
+
+def get_current_preview():
+    return compose_preview()[0]
+
+def compose_preview():
+    """Compose the chatbox text, returning it with each module's contribution"""
+    global current_time_text
+    plan = get_render_plan()
+
+    if show_time:
+        current_time_text = plan.clock.text()
+    else:
+        current_time_text = ""
+
+    ctx = {}
+    lines = []
+    parts = {}
+    for name, render in plan.segments:
+        text = render(ctx)
+        if text:
+            lines.append(text)
+            parts[name] = text
 
     result = "\n".join(lines).strip()
     
-    text_effect = SETTINGS.get("text_effect", "none")
-    if text_effect and text_effect != "none":
+    if plan.text_effect:
         try:
-            result = text_effects.apply_effect(result, text_effect)
+            result = text_effects.apply_effect(result, plan.text_effect)
         except Exception as e:
-            log_error(f"Failed to apply text effect '{text_effect}'", e)
+            log_error(f"Failed to apply text effect '{plan.text_effect}'", e)
     
-    return result
+    return result, parts
+
+class ComposedState:
+    """Everything derived from provider state for one tick, shared by all readers"""
+
+    def __init__(self, preview, parts, time_text, custom_text, song_text, progress_percent,
+                 progress_string, album_art, window_text, heartrate_text, weather_text, discord_text):
+        self.preview = preview
+        self.parts = parts
+        self.time_text = time_text
+        self.custom_text = custom_text
+        self.song_text = song_text
+        self.progress_percent = progress_percent
+        self.progress_string = progress_string
+        self.album_art = album_art
+        self.window_text = window_text
+        self.heartrate_text = heartrate_text
+        self.weather_text = weather_text
+        self.discord_text = discord_text
+        self.composed_at = time.time()
+
+def build_composed_state():
+    preview_msg, parts = compose_preview()
 
-def send_to_vrchat(message):
-    global last_message_sent, connection_status, last_successful_send, last_osc_send_time
+    wstate = window_tracker.get_window_state()
+    window_text = wstate.get("app_name", "No window detected") if show_window else "OFF"
     
-    current_time = time.time()
-    if current_time - last_osc_send_time < 0.5:
-        return False
+    hrstate = heart_rate_monitor.get_heart_rate_state()
+    heartrate_text = "Not connected"
+    if show_heartrate:
+        if hrstate.get("is_connected") and hrstate.get("bpm", 0) > 0:
+            heartrate_text = f"{hrstate['bpm']} BPM"
+        else:
+            heartrate_text = "Waiting for data..."
+
+    sstate = spotify.get_spotify_state()
+    song_text = "No song playing"
+    progress_percent = 0
+    album_art = ""
+
+    if show_music and sstate.get("song_text"):
+        try:
+            song_text = format_song_line(sstate)
+            progress_percent = get_progress_percent(sstate)
+            album_art = sstate.get("album_art", "")
+        except Exception:
+            song_text = sstate.get("song_text", "No song playing")
+            progress_percent = 0
+
+    progress_str = ""
+    if SETTINGS.get("music_progress", True) and show_music and sstate.get("song_text"):
+        progress_str = format_progress(SETTINGS.get("progress_style", "bar"), progress_percent)
+
+    weather_text = "OFF"
+    try:
+        weath_state = weather_service.get_weather_state()
+        if show_weather:
+            if weath_state.get("temperature"):
+                weather_text = f"{weath_state.get('temperature')} - {weath_state.get('condition', 'N/A')}"
+            else:
+                weather_text = "Loading..."
+    except Exception as e:
+        log_error("Failed to get weather state", e)
+        weather_text = "Error"
     
-    last_osc_send_time = current_time
+    discord_text = "OFF"
+    try:
+        discord_state = discord_rpc.get_discord_state()
+        if discord_state.get("enabled"):
+            discord_text = discord_state.get("activity", "Not connected")
+    except Exception as e:
+        log_error("Failed to get discord state", e)
+        discord_text = "Error"
+
+    return ComposedState(
+        preview=preview_msg,
+        parts=parts,
+        time_text=current_time_text if show_time else "OFF",
+        custom_text=current_custom_text if show_custom else "OFF",
+        song_text=song_text,
+        progress_percent=progress_percent,
+        progress_string=progress_str,
+        album_art=album_art,
+        window_text=window_text,
+        heartrate_text=heartrate_text,
+        weather_text=weather_text,
+        discord_text=discord_text
+    )
+
+composed_state = None
+composed_key = None
+composed_lock = threading.Lock()
+
+def composition_key():
+    """Changes whenever any input to the composition may have changed"""
+    return (
+        SETTINGS.version, show_time, show_custom, show_music, show_window, show_heartrate, show_weather,
+        current_custom_text, int(time.time() // 60),
+        spotify.state_version, window_tracker.state_version, heart_rate_monitor.state_version,
+        weather_service.state_version, discord_rpc.state_version
+    )
+
+def get_composed_state(force=False):
+    """
+    Return the composition for the current tick. It is rebuilt at most once
+    per change of settings, custom message, minute or provider state, or when
+    the updater forces a fresh one for its tick.
+    """
+    global composed_state, composed_key, first_composition_ms
+    key = composition_key()
+    if force or composed_state is None or composed_key != key:
+        with composed_lock:
+            if force or composed_state is None or composed_key != key:
+                composed_state = build_composed_state()
+                composed_key = key
+                if first_composition_ms is None and services_started_at is not None:
+                    first_composition_ms = round((time.perf_counter() - services_started_at) * 1000, 1)
+    return composed_state
+
+def build_live_status():
+    """Fields that change tick to tick; kept small for frequent polling"""
+    composed = get_composed_state()
+
+    last_send_str = "Never"
+    try:
+        if last_successful_send:
+            if isinstance(last_successful_send, datetime):
+                last_send_str = last_successful_send.strftime("%I:%M:%S %p")
+            else:
+                last_send_str = str(last_successful_send)
+    except Exception as e:
+        log_error("Failed to format last_successful_send", e)
+        last_send_str = "Error"
+
+    return {
+        "chatbox": chatbox_visible,
+        "auto_send_paused": auto_send_paused,
+        "time": composed.time_text,
+        "time_on": show_time,
+        "custom": composed.custom_text,
+        "custom_on": show_custom,
+        "song": composed.song_text,
+        "music_on": show_music,
+        "progress_percent": composed.progress_percent,
+        "progress_string": composed.progress_string,
+        "last_message": last_message_sent,
+        "preview": composed.preview,
+        "album_art": composed.album_art,
+        "next_custom": get_next_custom_in(),
+        "osc_queue_pending": osc_sender.pending_count(),
+        "connection_status": connection_status,
+        "last_successful_send": last_send_str,
+        "message_queue": message_queue,
+        "window": composed.window_text,
+        "window_on": show_window,
+        "heartrate": composed.heartrate_text,
+        "heartrate_on": show_heartrate,
+        "weather": composed.weather_text,
+        "weather_on": show_weather,
+        "discord": composed.discord_text
+    }
+
+def build_config_status():
+    """Settings-backed fields that only change when the user edits something"""
+    return {
+        "music_progress": SETTINGS.get("music_progress", True),
+        "progress_style": SETTINGS.get("progress_style", "bar"),
+        "theme": SETTINGS.get("theme", "dark"),
+        "streamer_mode": SETTINGS.get("streamer_mode", False),
+        "compact_mode": SETTINGS.get("compact_mode", False),
+        "custom_texts": SETTINGS.get("custom_texts", []),
+        "per_message_intervals": SETTINGS.get("per_message_intervals", {}),
+        "weighted_messages": SETTINGS.get("weighted_messages", {}),
+        "random_order": SETTINGS.get("random_order", False),
+        "show_module_icons": SETTINGS.get("show_module_icons", True),
+        "window_tracking_enabled": SETTINGS.get("window_tracking_enabled", False),
+        "heart_rate_enabled": SETTINGS.get("heart_rate_enabled", False),
+        "patreon_supporter": SETTINGS.get("patreon_supporter", False),
+        "weather_enabled": SETTINGS.get("weather_enabled", False),
+        "discord_enabled": SETTINGS.get("discord_enabled", False),
+        "text_effect": SETTINGS.get("text_effect", "none")
+    }
+
+def build_diagnostics_status():
+    """Per-target and per-provider counters; too bulky for the live view"""
+    providers = rate_limit.get_states()
+    if spotify.token_cache is not None:
+        providers.setdefault("spotify", {})["token"] = spotify.token_cache.get_stats()
+    return {
+        "osc_stats": change_detector.get_stats(),
+        "osc_targets": osc_transport.get_stats(),
+        "providers": providers
+    }
+
+def build_status_payload():
+    """Everything the dashboard shows, as served by /status and /events"""
+    payload = build_live_status()
+    payload.update(build_config_status())
+    payload.update(build_diagnostics_status())
+    return payload
+
+CONFIG_STATUS_FIELDS = frozenset(build_config_status())
+DIAGNOSTICS_STATUS_FIELDS = frozenset(build_diagnostics_status())
+
+status_feed = StatusFeed(build_status_payload, interval=DASHBOARD_UPDATE_INTERVAL)
+
+def deliver_to_vrchat(message):
+    """Write a chatbox message to OSC; called only from the sender thread"""
+    global last_message_sent, connection_status, last_successful_send
     
     if message:
         try:
-            client.send_message("/chatbox/input", [message, True])
+            osc_transport.send_chatbox(message)
             last_message_sent = message
+            change_detector.record_sent(message)
             connection_status = "connected"
             last_successful_send = datetime.now()
             print(f"[VRChat OSC SENT]\n{message}\n------------------")
+            if settings_db is not None:
+                try:
+                    settings_db.record_send(message)
+                except Exception as e:
+                    log_error("Failed to record sent message", e)
             return True
         except Exception as e:
             connection_status = "disconnected"
@@ -281,13 +535,21 @@ def send_to_vrchat(message):
             return False
     return False
 
+osc_sender = OSCSender(deliver_to_vrchat)
+
+def send_to_vrchat(message, priority=PRIORITY_ROTATION):
+    """Queue a chatbox message for delivery and return its ticket id"""
+    if not message:
+        return None
+    return osc_sender.submit(message, priority)
+
 def test_osc_connection():
     """Test OSC connection by sending a ping message"""
     global connection_status
     try:
-        client.send_message("/chatbox/visible", 1)
+        osc_transport.send_visible(True)
         time.sleep(0.1)
-        client.send_message("/chatbox/input", ["🔔 Connection Test", True])
+        osc_transport.send_chatbox("🔔 Connection Test")
         connection_status = "connected"
         return True
     except Exception as e:
@@ -295,89 +557,163 @@ def test_osc_connection():
         log_error("OSC connection test failed", e)
         return False
 
-def start_vrc_updater():
-    def updater():
-        global current_time_text, current_custom_text, last_message_sent
-        global text_cycle_index, next_custom_in, per_message_timers, client
-        print("[VRChat Updater] Thread started")
-
-        osc_interval = max(1, int(SETTINGS.get("osc_send_interval", 3)))
-        next_osc_send = osc_interval
-        
-        per_message_intervals = SETTINGS.get("per_message_intervals", {})
-        for idx in range(len(CUSTOM_TEXTS)):
-            key = str(idx)
-            if key not in per_message_timers:
-                per_message_timers[key] = per_message_intervals.get(key, osc_interval)
+def get_osc_interval():
+    """Base chatbox send interval in seconds"""
+    try:
+        return max(1.0, float(SETTINGS.get("osc_send_interval", 3)))
+    except (TypeError, ValueError):
+        return 3.0
+
+def get_message_interval(index):
+    """Send interval for a custom message, honoring per_message_intervals"""
+    interval = SETTINGS.get("per_message_intervals", {}).get(str(index))
+    if interval is None:
+        return get_osc_interval()
+    try:
+        return max(1.0, float(interval))
+    except (TypeError, ValueError):
+        return get_osc_interval()
+
+def get_current_interval():
+    if show_custom and CUSTOM_TEXTS:
+        return get_message_interval(text_cycle_index)
+    return get_osc_interval()
+
+def get_next_custom_in():
+    """Seconds until the next chatbox tick, for the dashboard countdown"""
+    remaining = scheduler.time_until("chatbox")
+    if remaining is None:
+        return 0
+    return int(math.ceil(remaining))
+
+def chatbox_tick(deadline):
+    """Rotate the custom message and push the composed chatbox to VRChat"""
+    global current_custom_text
+    try:
+        if show_custom and CUSTOM_TEXTS:
+            current_custom_text = get_next_custom_message()
+            update_message_queue()
+        else:
+            current_custom_text = ""
 
-        last_quest_ip = SETTINGS.get("quest_ip", "")
+        composed = get_composed_state(force=True)
+        preview_msg = composed.preview
 
-        while True:
+        if chatbox_visible and not auto_send_paused and preview_msg:
+            keepalive = float(SETTINGS.get("osc_keepalive_interval", 25))
+            if change_detector.should_send(preview_msg, composed.parts, keepalive):
+                send_to_vrchat(preview_msg)
+        elif chatbox_visible:
             try:
-                time.sleep(1)
-                
-                current_quest_ip = SETTINGS.get("quest_ip", "")
-                if current_quest_ip != last_quest_ip:
-                    print(f"[Auto-Reconnect] Quest or Desktop IP changed from {last_quest_ip} to {current_quest_ip}")
-                    client = make_client()
-                    last_quest_ip = current_quest_ip
-                
-                next_osc_send -= 1
-                next_custom_in = next_osc_send
-
-                if next_osc_send <= 0:
-                    if show_custom and CUSTOM_TEXTS:
-                        current_idx = str(text_cycle_index)
-                        per_msg_interval = SETTINGS.get("per_message_intervals", {}).get(current_idx, osc_interval)
-                        
-                        current_custom_text = get_next_custom_message()
-                        update_message_queue()
-                        
-                        next_idx = str(text_cycle_index)
-                        next_osc_send = SETTINGS.get("per_message_intervals", {}).get(next_idx, osc_interval)
-                    else:
-                        current_custom_text = ""
-                        osc_interval = max(1, int(SETTINGS.get("osc_send_interval", 3)))
-                        next_osc_send = osc_interval
-
-                    preview_msg = get_current_preview()
-
-                    if chatbox_visible and not auto_send_paused and preview_msg:
-                        send_to_vrchat(preview_msg)
-                    elif chatbox_visible:
-                        try:
-                            client.send_message("/chatbox/visible", 1)
-                        except:
-                            pass
-                    else:
-                        try:
-                            client.send_message("/chatbox/visible", 0)
-                        except:
-                            pass
-
-            except Exception as e:
-                log_error("VRC Updater error", e)
-                print("[VRC Updater ERROR]", e)
-                time.sleep(1)
-
-    threading.Thread(target=updater, daemon=True).start()
-
-def create_app():
-    app = Flask(__name__, template_folder="templates", static_folder="static")
+                osc_transport.send_visible(True)
+            except:
+                pass
+        else:
+            try:
+                osc_transport.send_visible(False)
+            except:
+                pass
+    except Exception as e:
+        log_error("VRC Updater error", e)
+        print("[VRC Updater ERROR]", e)
+    finally:
+        scheduler.call_at("chatbox", next_deadline(deadline, get_current_interval()), chatbox_tick)
+
+def reschedule_chatbox():
+    """Re-arm the chatbox tick after an interval setting changed"""
+    scheduler.call_later("chatbox", get_current_interval(), chatbox_tick)
+
+RESCHEDULE_KEYS = frozenset({"osc_send_interval", "per_message_intervals", "custom_texts"})
+DISPLAY_KEYS = frozenset({
+    "chatbox_visible", "show_time", "show_custom", "show_music",
+    "show_window", "show_heartrate", "show_weather"
+})
+
+def apply_settings_globals(changed):
+    """Re-derive the module globals that mirror SETTINGS after keys changed"""
+    global chatbox_visible, show_time, show_custom, show_music, show_window, show_heartrate, show_weather
+    global CUSTOM_TEXTS, current_custom_text, text_cycle_index
+    changed = set(changed)
+
+    chatbox_visible = SETTINGS.get("chatbox_visible", False)
+    show_time = SETTINGS.get("show_time", True)
+    show_custom = SETTINGS.get("show_custom", True)
+    show_music = SETTINGS.get("show_music", True)
+    show_window = SETTINGS.get("show_window", False)
+    show_heartrate = SETTINGS.get("show_heartrate", False)
+    show_weather = SETTINGS.get("show_weather", False)
+
+    if "custom_texts" in changed:
+        CUSTOM_TEXTS = SETTINGS.get("custom_texts", [])
+        text_cycle_index = 0
+        current_custom_text = CUSTOM_TEXTS[0] if CUSTOM_TEXTS else ""
+    if changed & DISPLAY_KEYS:
+        change_detector.reset()
+    if "chatbox_visible" in changed:
+        try:
+            osc_transport.send_visible(chatbox_visible)
+        except Exception as e:
+            log_error("Failed to send chatbox visibility", e)
+    if changed & RESCHEDULE_KEYS:
+        reschedule_chatbox()
+
+settings_patch_lock = threading.Lock()
+
+def clock_tick(deadline):
+    """Refresh every clock exactly on minute rollover"""
+    clock.refresh_all()
+    scheduler.call_later("clock", clock.seconds_until_next_minute(), clock_tick)
 
+def start_vrc_updater():
+    print("[VRChat Updater] Scheduling chatbox updates")
+    osc_sender.start()
+    scheduler.start()
+    # First tick right away so VRChat hears from us at startup, not one interval later
+    scheduler.call_later("chatbox", 0, chatbox_tick)
+    scheduler.call_later("clock", clock.seconds_until_next_minute(), clock_tick)
+
+services_lock = threading.Lock()
+services_pid = None
+services_started_at = None
+first_composition_ms = None
+
+def background_thread_names():
+    return (
+        spotify.TRACKER_NAME, window_tracker.TRACKER_NAME, heart_rate_monitor.TRACKER_NAME,
+        weather_service.TRACKER_NAME, discord_rpc.TRACKER_NAME,
+        osc_transport.name, osc_sender.name, scheduler.name
+    )
+
+def start_background_services():
+    """
+    Open the OSC targets and start the trackers and the updater, once per
+    process. Keyed on the pid so a forked server worker starts its own copy
+    instead of inheriting a flag for threads that did not survive the fork.
+    """
+    global services_pid, services_started_at
+    with services_lock:
+        if services_pid == os.getpid():
+            return False
+        services_pid = os.getpid()
+        services_started_at = time.perf_counter()
+
+    reconfigure_osc_targets()
+    SETTINGS.subscribe(OSC_TARGET_KEYS, on_osc_settings_changed)
     spotify.start_spotify_tracker(interval=1)
+    # Optional and may exit early (no dbus-next or session bus), so not part of /healthz
+    mpris.start_mpris_tracker()
     window_tracker.start_window_tracker(interval=SETTINGS.get("window_tracking_interval", 2))
     heart_rate_monitor.start_heart_rate_tracker(interval=SETTINGS.get("heart_rate_update_interval", 5))
-    weather_service.start_weather_tracker(
-        interval=SETTINGS.get("weather_update_interval", 600),
-        location=SETTINGS.get("weather_location", "auto"),
-        enabled=SETTINGS.get("weather_enabled", False)
-    )
-    discord_rpc.start_discord_tracker(
-        interval=SETTINGS.get("discord_update_interval", 10),
-        enabled=SETTINGS.get("discord_enabled", False)
-    )
+    weather_service.start_weather_tracker(interval=SETTINGS.get("weather_update_interval", 600))
+    discord_rpc.start_discord_tracker(interval=SETTINGS.get("discord_update_interval", 10))
     start_vrc_updater()
+    return True
+
+def create_app(start_services=True):
+    app = Flask(__name__, template_folder="templates", static_folder="static")
+
+    if start_services:
+        start_background_services()
 
     @app.route("/")
     def index():
@@ -429,136 +765,87 @@ def create_app():
             custom_button_color=SETTINGS.get("custom_button_color", "")
         )
 
+    @app.route("/healthz")
+    def healthz():
+        """Readiness: every background thread is alive and a chatbox has been composed"""
+        alive = {thread.name for thread in threading.enumerate()}
+        threads = {name: name in alive for name in background_thread_names()}
+        ready = (
+            services_pid == os.getpid()
+            and first_composition_ms is not None
+            and all(threads.values())
+        )
+        return jsonify({
+            "ready": ready,
+            "threads": threads,
+            "first_composition_ms": first_composition_ms,
+            "osc_targets": len(osc_transport.get_stats())
+        }), 200 if ready else 503
+
     @app.route("/status")
     def status():
-        global current_time_text, current_custom_text, last_message_sent
-        global show_time, show_custom, show_music, show_window, show_heartrate, auto_send_paused
-        global connection_status, last_successful_send, message_queue
-
-        time_text = current_time_text if show_time else "OFF"
-        custom_text = current_custom_text if show_custom else "OFF"
-        
-        wstate = window_tracker.get_window_state()
-        window_text = wstate.get("app_name", "No window detected") if show_window else "OFF"
-        
-        hrstate = heart_rate_monitor.get_heart_rate_state()
-        heartrate_text = "Not connected"
-        if show_heartrate:
-            if hrstate.get("is_connected") and hrstate.get("bpm", 0) > 0:
-                heartrate_text = f"{hrstate['bpm']} BPM"
-            else:
-                heartrate_text = "Waiting for data..."
-
-        sstate = spotify.get_spotify_state()
-        song_text = "No song playing"
-        progress_percent = 0
-        album_art = ""
-
-        if show_music and sstate.get("song_text"):
+        """
+        Full status, or one view of it (?view=live / ?view=config /
+        ?view=diagnostics). Responses carry the status version and an ETag;
+        If-None-Match gets a 304 when nothing changed and ?since=<version>
+        returns only the changed keys.
+        """
+        view = request.args.get("view", "all")
+        if view not in ("all", "live", "config", "diagnostics"):
+            return jsonify({"error": "view must be all, live, config or diagnostics"}), 400
+
+        since = request.args.get("since", type=int)
+        version, snapshot = status_feed.refresh()
+        if since is not None:
+            version, payload = status_feed.changes_since(since)
+        else:
+            payload = None
+        if payload is None:
+            payload = snapshot
+
+        if view == "live":
+            payload = {k: v for k, v in payload.items()
+                       if k not in CONFIG_STATUS_FIELDS and k not in DIAGNOSTICS_STATUS_FIELDS}
+        elif view == "config":
+            payload = {k: v for k, v in payload.items() if k in CONFIG_STATUS_FIELDS}
+        elif view == "diagnostics":
+            payload = {k: v for k, v in payload.items() if k in DIAGNOSTICS_STATUS_FIELDS}
+
+        response = jsonify(dict(payload, version=version))
+        response.set_etag(status_feed.etag(version, view), weak=True)
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
+    @app.route("/events")
+    def events():
+        """Server-Sent Events: one snapshot, then only the fields that changed"""
+        def stream():
+            version, sent = status_feed.subscribe()
             try:
-                pos = int(sstate.get("song_pos", 0))
-                dur = int(sstate.get("song_dur", 0))
-                elapsed_min, elapsed_sec = divmod(pos, 60)
-                total_min, total_sec = divmod(dur, 60)
-                song_text = f"{sstate['song_text']} [{elapsed_min}:{elapsed_sec:02d} / {total_min}:{total_sec:02d}]"
-                if dur > 0:
-                    progress_percent = int((pos / dur) * 100)
-                album_art = sstate.get("album_art", "")
-            except Exception:
-                song_text = sstate.get("song_text", "No song playing")
-                progress_percent = 0
-
-        progress_str = ""
-        if SETTINGS.get("music_progress", True) and show_music and sstate.get("song_text"):
-            style = SETTINGS.get("progress_style", "bar")
-            if style == "bar":
-                filled = int(progress_percent / 10)
-                empty = 10 - filled
-                progress_str = "█" * filled + "░" * empty
-            elif style == "dots":
-                filled = int(progress_percent / 10)
-                empty = 10 - filled
-                progress_str = "●" * filled + "○" * empty
-            elif style == "percentage":
-                progress_str = f"{progress_percent}%"
-
-        preview_msg = get_current_preview()
-
-        weather_text = "OFF"
-        try:
-            weath_state = weather_service.get_weather_state()
-            if show_weather:
-                if weath_state.get("temperature"):
-                    weather_text = f"{weath_state.get('temperature')} - {weath_state.get('condition', 'N/A')}"
-                else:
-                    weather_text = "Loading..."
-        except Exception as e:
-            log_error("Failed to get weather state", e)
-            weather_text = "Error"
-        
-        discord_text = "OFF"
-        try:
-            discord_state = discord_rpc.get_discord_state()
-            if discord_state.get("enabled"):
-                discord_text = discord_state.get("activity", "Not connected")
-        except Exception as e:
-            log_error("Failed to get discord state", e)
-            discord_text = "Error"
-        
-        last_send_str = "Never"
-        try:
-            if last_successful_send:
-                if isinstance(last_successful_send, datetime):
-                    last_send_str = last_successful_send.strftime("%I:%M:%S %p")
-                else:
-                    last_send_str = str(last_successful_send)
-        except Exception as e:
-            log_error("Failed to format last_successful_send", e)
-            last_send_str = "Error"
-        
-        return jsonify({
-            "chatbox": chatbox_visible,
-            "auto_send_paused": auto_send_paused,
-            "time": time_text,
-            "time_on": show_time,
-            "custom": custom_text,
-            "custom_on": show_custom,
-            "song": song_text,
-            "music_on": show_music,
-            "music_progress": SETTINGS.get("music_progress", True),
-            "progress_style": SETTINGS.get("progress_style", "bar"),
-            "progress_percent": progress_percent,
-            "progress_string": progress_str,
-            "last_message": last_message_sent,
-            "preview": preview_msg,
-            "album_art": album_art,
-            "next_custom": next_custom_in,
-            "connection_status": connection_status,
-            "last_successful_send": last_send_str,
-            "message_queue": message_queue,
-            "theme": SETTINGS.get("theme", "dark"),
-            "streamer_mode": SETTINGS.get("streamer_mode", False),
-            "compact_mode": SETTINGS.get("compact_mode", False),
-            "custom_texts": SETTINGS.get("custom_texts", []),
-            "per_message_intervals": SETTINGS.get("per_message_intervals", {}),
-            "weighted_messages": SETTINGS.get("weighted_messages", {}),
-            "random_order": SETTINGS.get("random_order", False),
-            "show_module_icons": SETTINGS.get("show_module_icons", True),
-            "window": window_text,
-            "window_on": show_window,
-            "window_tracking_enabled": SETTINGS.get("window_tracking_enabled", False),
-            "heartrate": heartrate_text,
-            "heartrate_on": show_heartrate,
-            "heart_rate_enabled": SETTINGS.get("heart_rate_enabled", False),
-            "patreon_supporter": SETTINGS.get("patreon_supporter", False),
-            "weather": weather_text,
-            "weather_on": show_weather,
-            "weather_enabled": SETTINGS.get("weather_enabled", False),
-            "discord": discord_text,
-            "discord_enabled": SETTINGS.get("discord_enabled", False),
-            "text_effect": SETTINGS.get("text_effect", "none")
+                yield format_event("snapshot", sent, version)
+                while True:
+                    new_version, snapshot = status_feed.wait_for_change(version)
+                    if new_version == version:
+                        yield ": keep-alive\n\n"
+                        continue
+                    changed = {k: v for k, v in snapshot.items() if sent.get(k) != v}
+                    version, sent = new_version, snapshot
+                    if changed:
+                        yield format_event("update", changed, version)
+            finally:
+                status_feed.unsubscribe()
+
+        return Response(stream(), mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
         })
 
+    @app.after_request
+    def push_status_after_change(response):
+        if request.method in ("POST", "PATCH"):
+            status_feed.poke()
+        return response
+
     @app.route("/send", methods=["POST"])
     def send():
         global last_message_sent
@@ -568,19 +855,25 @@ def create_app():
         else:
             msg = request.form.get("message", "").strip()
         if msg:
-            if send_to_vrchat(msg):
-                return jsonify({"ok": True}), 200
-            else:
-                return jsonify({"ok": False, "error": "OSC send failed"}), 500
+            ticket = send_to_vrchat(msg, PRIORITY_MANUAL)
+            return jsonify({"ok": True, "ticket": ticket}), 202
         return jsonify({"ok": False, "error": "empty"}), 400
 
     @app.route("/send_now", methods=["POST"])
     def send_now():
-        preview_msg = get_current_preview()
-        if preview_msg and send_to_vrchat(preview_msg):
-            return jsonify({"ok": True}), 200
+        preview_msg = get_composed_state().preview
+        if preview_msg:
+            ticket = send_to_vrchat(preview_msg, PRIORITY_MANUAL)
+            return jsonify({"ok": True, "ticket": ticket}), 202
         return jsonify({"ok": False}), 400
 
+    @app.route("/send_status/<int:ticket_id>", methods=["GET"])
+    def send_status(ticket_id):
+        ticket = osc_sender.get_ticket(ticket_id)
+        if not ticket:
+            return jsonify({"error": "Unknown ticket"}), 404
+        return jsonify(ticket), 200
+
     @app.route("/test_connection", methods=["POST"])
     def test_connection():
         if test_osc_connection():
@@ -590,7 +883,7 @@ def create_app():
     @app.route("/ping_quest", methods=["POST"])
     def ping_quest():
         try:
-            client.send_message("/chatbox/visible", 1)
+            osc_transport.send_visible(True)
             return jsonify({"ok": True}), 200
         except Exception as e:
             log_error("Ping Quest failed", e)
@@ -600,17 +893,17 @@ def create_app():
     def toggle_chatbox():
         global chatbox_visible
         chatbox_visible = not chatbox_visible
+        change_detector.reset()
         SETTINGS["chatbox_visible"] = chatbox_visible
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         if chatbox_visible:
             try:
-                client.send_message("/chatbox/visible", 1)
+                osc_transport.send_visible(True)
             except:
                 pass
         else:
             try:
-                client.send_message("/chatbox/visible", 0)
+                osc_transport.send_visible(False)
             except:
                 pass
         return ("", 204)
@@ -619,6 +912,7 @@ def create_app():
     def toggle_auto_send():
         global auto_send_paused
         auto_send_paused = not auto_send_paused
+        change_detector.reset()
         return ("", 204)
 
     @app.route("/toggle_time", methods=["POST"])
@@ -626,8 +920,7 @@ def create_app():
         global show_time
         show_time = not show_time
         SETTINGS["show_time"] = show_time
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return ("", 204)
 
     @app.route("/toggle_custom", methods=["POST"])
@@ -635,8 +928,7 @@ def create_app():
         global show_custom
         show_custom = not show_custom
         SETTINGS["show_custom"] = show_custom
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return ("", 204)
 
     @app.route("/toggle_music", methods=["POST"])
@@ -644,51 +936,44 @@ def create_app():
         global show_music
         show_music = not show_music
         SETTINGS["show_music"] = show_music
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return ("", 204)
 
     @app.route("/toggle_music_progress", methods=["POST"])
     def toggle_music_progress():
         SETTINGS["music_progress"] = not SETTINGS.get("music_progress", True)
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return ("", 204)
 
     @app.route("/toggle_theme", methods=["POST"])
     def toggle_theme():
         current = SETTINGS.get("theme", "dark")
         SETTINGS["theme"] = "light" if current == "dark" else "dark"
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"theme": SETTINGS["theme"]}), 200
 
     @app.route("/toggle_random_order", methods=["POST"])
     def toggle_random_order():
         SETTINGS["random_order"] = not SETTINGS.get("random_order", False)
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return ("", 204)
 
     @app.route("/toggle_module_icons", methods=["POST"])
     def toggle_module_icons():
         SETTINGS["show_module_icons"] = not SETTINGS.get("show_module_icons", True)
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return ("", 204)
 
     @app.route("/toggle_streamer_mode", methods=["POST"])
     def toggle_streamer_mode():
         SETTINGS["streamer_mode"] = not SETTINGS.get("streamer_mode", False)
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"streamer_mode": SETTINGS["streamer_mode"]}), 200
 
     @app.route("/toggle_compact_mode", methods=["POST"])
     def toggle_compact_mode():
         SETTINGS["compact_mode"] = not SETTINGS.get("compact_mode", False)
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"compact_mode": SETTINGS["compact_mode"]}), 200
 
     @app.route("/set_progress_style", methods=["POST"])
@@ -697,8 +982,7 @@ def create_app():
         style = data.get("style", "bar")
         if style in ["bar", "dots", "percentage"]:
             SETTINGS["progress_style"] = style
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(SETTINGS, f, indent=4)
+            settings_writer.save()
         return ("", 204)
     
     @app.route("/toggle_window", methods=["POST"])
@@ -706,8 +990,7 @@ def create_app():
         global show_window
         show_window = not show_window
         SETTINGS["show_window"] = show_window
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return ("", 204)
     
     @app.route("/toggle_window_tracking", methods=["POST"])
@@ -716,8 +999,7 @@ def create_app():
         SETTINGS["window_tracking_enabled"] = not SETTINGS.get("window_tracking_enabled", False)
         show_window = SETTINGS["window_tracking_enabled"]
         SETTINGS["show_window"] = show_window
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"window_tracking_enabled": SETTINGS["window_tracking_enabled"]}), 200
     
     @app.route("/save_window_tracking_mode", methods=["POST"])
@@ -726,8 +1008,7 @@ def create_app():
         mode = data.get("mode", "both")
         if mode in ["app", "browser", "both"]:
             SETTINGS["window_tracking_mode"] = mode
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(SETTINGS, f, indent=4)
+            settings_writer.save()
         return jsonify({"ok": True}), 200
     
     @app.route("/toggle_heartrate", methods=["POST"])
@@ -735,8 +1016,7 @@ def create_app():
         global show_heartrate
         show_heartrate = not show_heartrate
         SETTINGS["show_heartrate"] = show_heartrate
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return ("", 204)
     
     @app.route("/toggle_heart_rate_enabled", methods=["POST"])
@@ -745,8 +1025,7 @@ def create_app():
         SETTINGS["heart_rate_enabled"] = not SETTINGS.get("heart_rate_enabled", False)
         show_heartrate = SETTINGS["heart_rate_enabled"]
         SETTINGS["show_heartrate"] = show_heartrate
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"heart_rate_enabled": SETTINGS["heart_rate_enabled"]}), 200
     
     @app.route("/save_heart_rate_settings", methods=["POST"])
@@ -757,8 +1036,7 @@ def create_app():
         SETTINGS["heart_rate_hyperate_id"] = data.get("hyperate_id", "")
         SETTINGS["heart_rate_custom_api"] = data.get("custom_api", "")
         SETTINGS["heart_rate_update_interval"] = int(data.get("update_interval", 5))
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"ok": True}), 200
     
     @app.route("/save_emoji_settings", methods=["POST"])
@@ -774,8 +1052,7 @@ def create_app():
         SETTINGS["window_emoji"] = window_emoji[:5] if window_emoji else "💻"
         SETTINGS["heartrate_emoji"] = heartrate_emoji[:5] if heartrate_emoji else "❤️"
         
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"ok": True}), 200
     
     @app.route("/verify_patreon_supporter", methods=["POST"])
@@ -802,8 +1079,7 @@ def create_app():
             if provided_signature.upper() == expected_signature:
                 SETTINGS["patreon_supporter"] = True
                 SETTINGS["supporter_email_hash"] = email_hash
-                with open(SETTINGS_FILE, "w") as f:
-                    json.dump(SETTINGS, f, indent=4)
+                settings_writer.save()
                 return jsonify({"ok": True, "patreon_supporter": True, "message": "Supporter status activated!"}), 200
             else:
                 return jsonify({"ok": False, "patreon_supporter": False, "message": "Invalid supporter code"}), 403
@@ -817,8 +1093,7 @@ def create_app():
             del SETTINGS["supporter_code"]
         if "supporter_email_hash" in SETTINGS:
             del SETTINGS["supporter_email_hash"]
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"patreon_supporter": False}), 200
     
     @app.route("/save_premium_styling", methods=["POST"])
@@ -833,13 +1108,11 @@ def create_app():
         SETTINGS["custom_background"] = custom_background[:200] if custom_background else ""
         SETTINGS["custom_button_color"] = custom_button_color[:50] if custom_button_color else ""
         
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"ok": True}), 200
 
     @app.route("/save_settings", methods=["POST"])
     def save_settings():
-        global client
         ip = request.form.get("quest_ip", SETTINGS.get("quest_ip"))
         port = int(request.form.get("quest_port", SETTINGS.get("quest_port")))
         osc_send_interval = int(request.form.get("osc_send_interval", SETTINGS.get("osc_send_interval", 3)))
@@ -860,12 +1133,32 @@ def create_app():
             "spotify_client_secret": spotify_secret,
             "spotify_redirect_uri": redirect_uri
         })
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
-        client = make_client()
-        spotify.init_spotify_web()
+        settings_writer.save()
+        reschedule_chatbox()
         return redirect("/")
 
+    @app.route("/save_osc_targets", methods=["POST"])
+    def save_osc_targets():
+        data = request.get_json(force=True)
+        targets = []
+        for entry in data.get("targets", []):
+            ip = str(entry.get("ip", "")).strip()
+            if not ip:
+                continue
+            try:
+                port = int(entry.get("port", 9000))
+            except (TypeError, ValueError):
+                return jsonify({"ok": False, "error": f"Invalid port for {ip}"}), 400
+            targets.append({
+                "name": str(entry.get("name", "")).strip()[:40],
+                "ip": ip,
+                "port": port,
+                "enabled": bool(entry.get("enabled", True))
+            })
+        SETTINGS["osc_targets"] = targets
+        settings_writer.save()
+        return jsonify({"ok": True, "targets": osc_transport.get_stats()}), 200
+
     @app.route("/save_customs", methods=["POST"])
     def save_customs():
         text = request.form.get("customs", "").strip()
@@ -873,8 +1166,7 @@ def create_app():
         if not lines:
             lines = ["Custom Message Test"]
         SETTINGS["custom_texts"] = lines
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         nonlocal_vars_update_customs(lines)
         return redirect("/")
 
@@ -886,8 +1178,8 @@ def create_app():
         
         if 0 <= index < len(SETTINGS["custom_texts"]):
             SETTINGS["custom_texts"][index] = new_text
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(SETTINGS, f, indent=4)
+            SETTINGS.touch("custom_texts")
+            settings_writer.save()
             nonlocal_vars_update_customs(SETTINGS["custom_texts"])
             return jsonify({"ok": True}), 200
         return jsonify({"ok": False}), 400
@@ -899,8 +1191,8 @@ def create_app():
         
         if new_text:
             SETTINGS["custom_texts"].append(new_text)
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(SETTINGS, f, indent=4)
+            SETTINGS.touch("custom_texts")
+            settings_writer.save()
             nonlocal_vars_update_customs(SETTINGS["custom_texts"])
             return jsonify({"ok": True}), 200
         return jsonify({"ok": False}), 400
@@ -912,10 +1204,10 @@ def create_app():
         
         if 0 <= index < len(SETTINGS["custom_texts"]):
             SETTINGS["custom_texts"].pop(index)
+            SETTINGS.touch("custom_texts")
             if not SETTINGS["custom_texts"]:
                 SETTINGS["custom_texts"] = ["Custom Message Test"]
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(SETTINGS, f, indent=4)
+            settings_writer.save()
             nonlocal_vars_update_customs(SETTINGS["custom_texts"])
             return jsonify({"ok": True}), 200
         return jsonify({"ok": False}), 400
@@ -935,8 +1227,7 @@ def create_app():
             return jsonify({"ok": False}), 400
         
         SETTINGS["custom_texts"] = messages
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         nonlocal_vars_update_customs(SETTINGS["custom_texts"])
         return jsonify({"ok": True}), 200
 
@@ -950,8 +1241,8 @@ def create_app():
             SETTINGS["weighted_messages"] = {}
         
         SETTINGS["weighted_messages"][index] = max(1, weight)
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        SETTINGS.touch("weighted_messages")
+        settings_writer.save()
         return jsonify({"ok": True}), 200
 
     def nonlocal_vars_update_customs(lines):
@@ -965,10 +1256,40 @@ def create_app():
         data = request.get_json(force=True)
         intervals = data.get("intervals", {})
         SETTINGS["per_message_intervals"] = intervals
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
+        reschedule_chatbox()
         return jsonify({"ok": True}), 200
 
+    @app.route("/settings", methods=["PATCH"])
+    def patch_settings():
+        """
+        Apply many setting changes in one request. Every key is validated
+        before anything is applied; then SETTINGS and the derived globals are
+        updated together and persisted with a single write.
+        """
+        data = request.get_json(force=True, silent=True)
+        if not isinstance(data, dict) or not data:
+            return jsonify({"ok": False, "error": "Expected a JSON object of settings"}), 400
+
+        with settings_patch_lock:
+            updates = {}
+            errors = {}
+            for key, value in data.items():
+                try:
+                    updates[key] = validate_setting(key, value, SETTINGS.get(key))
+                except ValueError as e:
+                    errors[key] = str(e)
+            if errors:
+                return jsonify({"ok": False, "errors": errors}), 400
+
+            changed = {key: value for key, value in updates.items() if SETTINGS.get(key) != value}
+            if changed:
+                SETTINGS.update(changed)
+                apply_settings_globals(changed)
+                settings_writer.save()
+
+        return jsonify({"ok": True, "changed": sorted(changed), "version": SETTINGS.version}), 200
+
     @app.route("/save_layout", methods=["POST"])
     def save_layout():
         data = request.get_json(force=True)
@@ -978,43 +1299,31 @@ def create_app():
         if not filtered:
             filtered = ["time", "custom", "song", "window", "heartrate"]
         SETTINGS["layout_order"] = filtered
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"ok": True}), 200
 
     @app.route("/reset_settings", methods=["POST"])
     def reset_settings():
-        global client, CUSTOM_TEXTS, current_custom_text, text_cycle_index
-        
         from settings import DEFAULTS
         
-        SETTINGS.clear()
-        SETTINGS.update(DEFAULTS)
+        # One swap so subscribers (OSC targets, Spotify, trackers) see only the final values
+        with settings_patch_lock:
+            changed = SETTINGS.replace(copy.deepcopy(DEFAULTS))
+            apply_settings_globals(changed)
         
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
-        
-        CUSTOM_TEXTS = DEFAULTS["custom_texts"]
-        text_cycle_index = 0
-        current_custom_text = CUSTOM_TEXTS[0]
-        client = make_client()
+        settings_writer.save()
         
         return jsonify({"ok": True}), 200
 
     @app.route("/download_settings", methods=["GET"])
     def download_settings():
         try:
-            abs_path = os.path.abspath(SETTINGS_FILE)
-            if not os.path.exists(abs_path):
-                return jsonify({"error": "Settings file not found"}), 404
-            
-            return send_file(
-                abs_path,
-                as_attachment=True,
-                download_name=f"vrchat_chatbox_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            # Exported from memory so it works the same with the SQLite backend
+            filename = f"vrchat_chatbox_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            return Response(
+                json.dumps(dict(SETTINGS), indent=4),
                 mimetype='application/json',
-                etag=False,
-                conditional=False
+                headers={"Content-Disposition": f"attachment; filename={filename}"}
             )
         except Exception as e:
             log_error("Failed to download settings", e)
@@ -1035,22 +1344,51 @@ def create_app():
                 else:
                     validated_settings[key] = default_value
             
-            SETTINGS.clear()
-            SETTINGS.update(validated_settings)
-            
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(SETTINGS, f, indent=4)
+            with settings_patch_lock:
+                changed = SETTINGS.replace(validated_settings)
+                apply_settings_globals(changed)
             
-            global client, CUSTOM_TEXTS, current_custom_text, text_cycle_index
-            CUSTOM_TEXTS = SETTINGS.get("custom_texts", [])
-            text_cycle_index = 0
-            current_custom_text = CUSTOM_TEXTS[0] if CUSTOM_TEXTS else "Custom Message Test"
-            client = make_client()
+            settings_writer.save()
             
             return jsonify({"ok": True}), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 400
 
+    @app.route("/settings_stats", methods=["GET"])
+    def settings_stats():
+        return jsonify(settings_writer.get_stats()), 200
+
+    @app.route("/album_art/<album_id>", methods=["GET"])
+    def album_art_thumbnail(album_id):
+        cached = album_art_cache.fetch(album_id)
+        if cached is None:
+            source = album_art_cache.source_url(album_id)
+            if source:
+                return redirect(source)
+            return jsonify({"error": "Album art not found"}), 404
+        path, mimetype = cached
+        # Covers never change for an album id, so browsers can keep them for a year
+        response = send_file(os.path.abspath(path), mimetype=mimetype, max_age=365 * 24 * 3600)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    @app.route("/album_art_stats", methods=["GET"])
+    def album_art_stats():
+        return jsonify(album_art_cache.get_stats()), 200
+
+    @app.route("/send_history", methods=["GET"])
+    def send_history():
+        """Recently sent chatbox messages, newest first (SQLite storage only)"""
+        if settings_db is None:
+            return jsonify({"enabled": False, "messages": []}), 200
+        try:
+            limit = min(max(int(request.args.get("limit", 50)), 1), 500)
+            before = request.args.get("before", type=float)
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        return jsonify({"enabled": True, "messages": settings_db.send_history(limit, before)}), 200
+
     @app.route("/download_log", methods=["GET"])
     def download_log():
         abs_path = os.path.abspath(ERROR_LOG_FILE)
@@ -1099,14 +1437,11 @@ def create_app():
         global show_weather
         show_weather = not show_weather
         SETTINGS["show_weather"] = show_weather
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         
         if show_weather and not SETTINGS.get("weather_enabled"):
-            weather_service.enable_weather()
             SETTINGS["weather_enabled"] = True
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(SETTINGS, f, indent=4)
+            settings_writer.save()
         
         return jsonify({"show_weather": show_weather, "weather_enabled": SETTINGS.get("weather_enabled", False)}), 200
 
@@ -1120,8 +1455,7 @@ def create_app():
         data = request.get_json()
         location = data.get("location", "auto")
         SETTINGS["weather_location"] = location
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         return jsonify({"ok": True}), 200
 
     @app.route("/check_updates", methods=["GET"])
@@ -1204,8 +1538,6 @@ def create_app():
 
     @app.route("/load_profile", methods=["POST"])
     def load_profile():
-        global show_time, show_custom, show_music, show_window, show_heartrate, show_weather
-        
         data = request.get_json()
         name = data.get("name", "")
         
@@ -1219,18 +1551,10 @@ def create_app():
         
         settings = profile.get("settings", {})
         
-        show_time = settings.get("show_time", True)
-        show_custom = settings.get("show_custom", True)
-        show_music = settings.get("show_music", True)
-        show_window = settings.get("show_window", False)
-        show_heartrate = settings.get("show_heartrate", False)
-        show_weather = settings.get("show_weather", False)
+        SETTINGS.update(settings)
+        apply_settings_globals(settings)
         
-        for key, value in settings.items():
-            SETTINGS[key] = value
-        
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         
         return jsonify({"ok": True, "message": "Profile loaded"}), 200
 
@@ -1258,8 +1582,7 @@ def create_app():
         effect = data.get("effect", "none")
         
         SETTINGS["text_effect"] = effect
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         
         return jsonify({"ok": True, "effect": effect}), 200
 
@@ -1267,14 +1590,7 @@ def create_app():
     def toggle_discord():
         enabled = not SETTINGS.get("discord_enabled", False)
         SETTINGS["discord_enabled"] = enabled
-        
-        if enabled:
-            discord_rpc.enable_discord()
-        else:
-            discord_rpc.disable_discord()
-        
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(SETTINGS, f, indent=4)
+        settings_writer.save()
         
         return jsonify({"discord_enabled": enabled}), 200
 
@@ -1285,4 +1601,15 @@ def create_app():
 
     return app
 
-app = create_app()
+_app = None
+_app_lock = threading.Lock()
+
+def __getattr__(name):
+    """Build routes.app on first use (e.g. `gunicorn routes:app`), not at import"""
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _app_lock:
+        if _app is None:
+            _app = create_app()
+    return _app
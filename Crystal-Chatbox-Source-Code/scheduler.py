@@ -0,0 +1,110 @@
+"""
+Deadline Scheduler
+Runs keyed jobs from a min-heap of monotonic deadlines
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """
+    Single worker thread that sleeps until the earliest pending deadline.
+
+    Jobs are identified by a key; scheduling a key that is already pending
+    replaces its deadline. Callbacks receive the deadline they were scheduled
+    for so periodic jobs can re-arm themselves without accumulating drift.
+    """
+
+    def __init__(self, name="Scheduler"):
+        self.name = name
+        self._heap = []
+        self._jobs = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def call_at(self, key, deadline, callback):
+        """Run callback(deadline) at the given time.monotonic() deadline"""
+        with self._cond:
+            seq = next(self._counter)
+            self._jobs[key] = (deadline, seq, callback)
+            heapq.heappush(self._heap, (deadline, seq, key))
+            self._cond.notify()
+
+    def call_later(self, key, delay, callback):
+        """Run callback after delay seconds"""
+        self.call_at(key, time.monotonic() + max(0.0, delay), callback)
+
+    def cancel(self, key):
+        """Drop a pending job; stale heap entries are discarded lazily"""
+        with self._cond:
+            removed = self._jobs.pop(key, None) is not None
+            self._cond.notify()
+        return removed
+
+    def time_until(self, key):
+        """Seconds until the job fires, or None if it is not pending"""
+        with self._cond:
+            job = self._jobs.get(key)
+        if job is None:
+            return None
+        return max(0.0, job[0] - time.monotonic())
+
+    def start(self):
+        """Start the worker thread (no-op if already running)"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _pop_due(self):
+        with self._cond:
+            while True:
+                while self._heap:
+                    deadline, seq, key = self._heap[0]
+                    job = self._jobs.get(key)
+                    if job is not None and job[1] == seq:
+                        break
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                deadline, seq, key = self._heap[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                heapq.heappop(self._heap)
+                _, _, callback = self._jobs.pop(key)
+                return key, deadline, callback
+
+    def _run(self):
+        print(f"[{self.name}] Thread started")
+        while True:
+            key, deadline, callback = self._pop_due()
+            try:
+                callback(deadline)
+            except Exception as e:
+                logger.error(f"Scheduled job '{key}' failed: {e}")
+                print(f"[{self.name} ERROR] {key}: {e}")
+
+
+def next_deadline(previous, interval):
+    """
+    Advance a periodic deadline by interval, resyncing to now if the
+    job has fallen more than a full interval behind.
+    """
+    now = time.monotonic()
+    deadline = previous + interval
+    if deadline <= now:
+        deadline = now + interval
+    return deadline
@@ -1,17 +1,30 @@
+import atexit
 import json
+import logging
 import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 SETTINGS_FILE = "settings.json"
+# "json" (settings.json) or "sqlite" (storage.DB_FILE, migrated from the JSON files on first run)
+STORAGE_ENGINE = os.environ.get("CHATBOX_STORAGE", "json").strip().lower()
+SAVE_DEBOUNCE_SECONDS = 0.5
+SAVE_MAX_DELAY_SECONDS = 2.0
 
 DEFAULTS = {
     "quest_ip": "",
     "quest_port": 9000,
+    "osc_targets": [],
     "spotify_client_id": "",
     "spotify_client_secret": "",
     "spotify_redirect_uri": "",
     "custom_texts": ["Custom Message Test"],
     "refresh_interval": 3,
     "osc_send_interval": 3,
+    "osc_keepalive_interval": 25,
     "dashboard_update_interval": 1,
     "per_message_intervals": {},
     "music_progress": True,
@@ -57,18 +70,388 @@ DEFAULTS = {
     "discord_update_interval": 10
 }
 
-if os.path.exists(SETTINGS_FILE):
+SETTING_CHOICES = {
+    "progress_style": ("bar", "dots", "percentage"),
+    "theme": ("dark", "light"),
+    "window_tracking_mode": ("app", "browser", "both"),
+    "heart_rate_source": ("pulsoid", "hyperate", "custom"),
+    "text_effect": ("none", "rainbow", "sparkle", "fire", "ice", "heart")
+}
+
+MAX_LENGTHS = {
+    "time_emoji": 5,
+    "song_emoji": 5,
+    "window_emoji": 5,
+    "heartrate_emoji": 5,
+    "custom_background": 200,
+    "custom_button_color": 50
+}
+
+# Only changed through their dedicated flows (e.g. supporter code verification)
+PROTECTED_SETTINGS = frozenset({"patreon_supporter"})
+
+# Dict settings whose entries must be numbers >= 1 (seconds, weights)
+POSITIVE_NUMBER_MAPS = ("per_message_intervals", "weighted_messages")
+
+def validate_setting(key, value, current=None):
+    """
+    Check one incoming value against DEFAULTS and return what should be
+    stored. Dict settings follow JSON merge-patch: the value is merged into
+    current and null removes an entry. Raises ValueError with a message fit
+    for the client.
+    """
+    if key not in DEFAULTS:
+        raise ValueError("unknown setting")
+    if key in PROTECTED_SETTINGS:
+        raise ValueError("setting cannot be changed here")
+
+    default = DEFAULTS[key]
+    expected = type(default)
+    if expected is int and isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        raise ValueError(f"expected {expected.__name__}")
+
+    if key in SETTING_CHOICES and value not in SETTING_CHOICES[key]:
+        raise ValueError(f"must be one of {', '.join(SETTING_CHOICES[key])}")
+    if key in MAX_LENGTHS and len(value) > MAX_LENGTHS[key]:
+        raise ValueError(f"must be at most {MAX_LENGTHS[key]} characters")
+    if expected is int and value < 0:
+        raise ValueError("must not be negative")
+    if key == "quest_port" and not 1 <= value <= 65535:
+        raise ValueError("must be a port number")
+    if key == "custom_texts" and not all(isinstance(t, str) for t in value):
+        raise ValueError("expected a list of strings")
+
+    if expected is dict:
+        merged = dict(current or {})
+        for entry, entry_value in value.items():
+            if entry_value is None:
+                merged.pop(entry, None)
+            elif key in POSITIVE_NUMBER_MAPS and (
+                    not isinstance(entry_value, (int, float)) or isinstance(entry_value, bool) or entry_value < 1):
+                raise ValueError(f"entry '{entry}' must be a number of at least 1")
+            else:
+                merged[entry] = entry_value
+        value = merged
+    return value
+
+_MISSING = object()
+
+class VersionedSettings(dict):
+    """
+    Settings dict with a version counter bumped on every top-level mutation.
+    Code that edits a nested list or dict in place must call touch(key).
+
+    Per-key versions back the change hooks: subscribe() runs a callback on
+    the mutating thread when one of its keys changes, and wait_for_change()
+    / wait_until() let tracker threads sleep until a key they care about
+    moves instead of re-reading SETTINGS on a timer.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+        self._key_versions = {}
+        self._subscribers = []
+        self._changed = threading.Condition()
+
+    def touch(self, *keys):
+        with self._changed:
+            self.version += 1
+            for key in keys:
+                self._key_versions[key] = self.version
+            self._changed.notify_all()
+        if keys:
+            self._notify(keys)
+
+    def _notify(self, keys):
+        # One call per subscriber per mutation, even when update() hit several of its keys
+        for sub_keys, callback in list(self._subscribers):
+            key = next((k for k in keys if sub_keys is None or k in sub_keys), None)
+            if key is None:
+                continue
+            try:
+                callback(key, self.get(key))
+            except Exception as e:
+                logger.error(f"Settings subscriber for '{key}' failed: {e}")
+
+    @staticmethod
+    def _differs(old, new):
+        # Reassigning the same list/dict object usually follows an in-place edit
+        return old is new and isinstance(new, (list, dict)) or old != new
+
+    def __setitem__(self, key, value):
+        old = self.get(key, _MISSING)
+        super().__setitem__(key, value)
+        self.touch(*((key,) if self._differs(old, value) else ()))
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.touch(key)
+
+    def update(self, *args, **kwargs):
+        new = dict(*args, **kwargs)
+        changed = [k for k, v in new.items() if self._differs(self.get(k, _MISSING), v)]
+        super().update(new)
+        self.touch(*changed)
+
+    def replace(self, mapping):
+        """
+        Swap the whole contents for mapping in one step, notifying once and
+        only for keys that were added, removed or changed; returns those keys
+        """
+        new = dict(mapping)
+        changed = [k for k in self if k not in new]
+        changed += [k for k, v in new.items() if self._differs(self.get(k, _MISSING), v)]
+        super().clear()
+        super().update(new)
+        self.touch(*changed)
+        return changed
+
+    def clear(self):
+        keys = list(self)
+        super().clear()
+        self.touch(*keys)
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        self.touch(*((key,) if present else ()))
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self.touch(item[0])
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def subscribe(self, keys, callback):
+        """Call callback(key, value) after any of keys changes (keys=None: any key)"""
+        self._subscribers.append((frozenset(keys) if keys is not None else None, callback))
+
+    def changed_since(self, version):
+        """Keys set or deleted after version"""
+        return [key for key, key_version in list(self._key_versions.items()) if key_version > version]
+
+    def key_version(self, keys):
+        return max((self._key_versions.get(key, 0) for key in keys), default=0)
+
+    def wait_for_change(self, keys, timeout=None, since=None):
+        """
+        Block until one of keys changes after since (default: now) or timeout
+        expires; returns True if something changed
+        """
+        with self._changed:
+            start = self.key_version(keys) if since is None else since
+            return self._changed.wait_for(lambda: self.key_version(keys) > start, timeout)
+
+    def wait_until(self, predicate, keys):
+        """Block until predicate(self) holds, re-checking whenever keys change"""
+        with self._changed:
+            while not predicate(self):
+                version = self.key_version(keys)
+                self._changed.wait_for(lambda: self.key_version(keys) > version)
+
+def atomic_write_text(path, data):
+    """Write data (str, or bytes) to a temp file beside path, fsync it, then os.replace it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    prefix = "." + os.path.splitext(os.path.basename(path))[0] + "-"
+    binary = isinstance(data, bytes)
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile("wb" if binary else "w", dir=directory, prefix=prefix, suffix=".tmp",
+                                         delete=False, encoding=None if binary else "utf-8") as f:
+            tmp_path = f.name
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        raise
+
+class SettingsWriter:
+    """
+    Persists a settings dict from one background thread. save() only marks
+    the settings dirty; changes arriving within the debounce window (capped
+    at max_delay after the first one) go out as a single write through a temp
+    file and os.replace, so a crash never leaves a truncated settings.json.
+
+    With a storage.Database as db, only the keys changed since the last write
+    are upserted (and deleted keys removed) in one transaction instead.
+    """
+
+    def __init__(self, path, settings, debounce=SAVE_DEBOUNCE_SECONDS,
+                 max_delay=SAVE_MAX_DELAY_SECONDS, name="Settings Writer", db=None):
+        self.path = path
+        self.settings = settings
+        self.db = db
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.name = name
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._dirty_since = None
+        self._last_request = None
+        # The database rows match the dict it was loaded from; the JSON file is rewritten whole anyway
+        self._written_version = settings.version if db is not None else None
+        self._thread = None
+        self.stats = {
+            "requests": 0,
+            "writes": 0,
+            "skipped": 0,
+            "failures": 0,
+            "last_write_ms": None,
+            "max_write_ms": None,
+            "total_write_ms": 0.0,
+            "last_write": None,
+            "last_error": ""
+        }
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def save(self):
+        """Schedule a write of the current settings"""
+        self.start()
+        now = time.monotonic()
+        with self._cond:
+            self.stats["requests"] += 1
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._last_request = now
+            self._cond.notify_all()
+
+    def flush(self):
+        """Write pending changes now, e.g. before a download or at exit"""
+        with self._cond:
+            pending = self._dirty_since is not None
+            self._dirty_since = None
+        if pending:
+            self._write()
+
+    def write_now(self):
+        with self._cond:
+            self._dirty_since = None
+        self._write(force=True)
+
+    def _encode(self, full):
+        version = self.settings.version
+        if self.db is None:
+            return version, json.dumps(dict(self.settings), indent=4)
+        if full or self._written_version is None:
+            keys = list(self.settings)
+        else:
+            keys = self.settings.changed_since(self._written_version)
+        encoded = {key: json.dumps(self.settings[key]) for key in keys if key in self.settings}
+        deleted = [key for key in keys if key not in encoded]
+        return version, (encoded, deleted)
+
+    def _serialize(self, full=False):
+        # Request threads may mutate nested lists mid-dump; retry on a fresh copy
+        for _ in range(3):
+            try:
+                return self._encode(full)
+            except RuntimeError:
+                time.sleep(0.01)
+        return self._encode(full)
+
+    def _write(self, force=False):
+        # _write_lock orders the writes themselves; stats are guarded by _cond
+        # like the rest of the writer's state, so save() never waits on the disk
+        with self._write_lock:
+            version, data = self._serialize(full=force)
+            if not force and version == self._written_version:
+                with self._cond:
+                    self.stats["skipped"] += 1
+                return
+            start = time.perf_counter()
+            try:
+                if self.db is None:
+                    atomic_write_text(self.path, data)
+                else:
+                    self.db.write_settings(*data)
+            except Exception as e:
+                with self._cond:
+                    self.stats["failures"] += 1
+                    self.stats["last_error"] = str(e)
+                logger.error(f"Failed to save settings: {e}")
+                return
+            elapsed = (time.perf_counter() - start) * 1000
+            self._written_version = version
+            with self._cond:
+                self.stats["writes"] += 1
+                self.stats["last_write_ms"] = round(elapsed, 3)
+                self.stats["max_write_ms"] = round(max(elapsed, self.stats["max_write_ms"] or 0), 3)
+                self.stats["total_write_ms"] += elapsed
+                self.stats["last_write"] = time.time()
+                self.stats["last_error"] = ""
+
+    def get_stats(self):
+        with self._cond:
+            stats = dict(self.stats)
+            stats["pending"] = self._dirty_since is not None
+        writes = stats.pop("total_write_ms")
+        stats["avg_write_ms"] = round(writes / stats["writes"], 3) if stats["writes"] else None
+        stats["coalesced"] = max(0, stats["requests"] - stats["writes"] - stats["skipped"])
+        return stats
+
+    def _run(self):
+        print(f"[{self.name}] Thread started")
+        while True:
+            with self._cond:
+                while self._dirty_since is None:
+                    self._cond.wait()
+                due = min(self._last_request + self.debounce, self._dirty_since + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._dirty_since = None
+            self._write()
+
+def _settings_rows(data):
+    return (("settings", key, json.dumps(value)) for key, value in data.items())
+
+settings_loaded = False
+settings_db = None
+if STORAGE_ENGINE == "sqlite":
+    import storage
+    settings_db = storage.get_db()
+    settings_db.migrate_json("settings", SETTINGS_FILE, _settings_rows)
+    stored = settings_db.load_settings()
+    settings_loaded = bool(stored)
+    SETTINGS = VersionedSettings(stored or DEFAULTS)
+elif os.path.exists(SETTINGS_FILE):
     try:
         with open(SETTINGS_FILE, "r") as f:
-            SETTINGS = json.load(f)
+            SETTINGS = VersionedSettings(json.load(f))
+        settings_loaded = True
     except:
-        SETTINGS = DEFAULTS.copy()
+        SETTINGS = VersionedSettings(DEFAULTS)
 else:
-    SETTINGS = DEFAULTS.copy()
+    SETTINGS = VersionedSettings(DEFAULTS)
+
+missing_defaults = [k for k in DEFAULTS if k not in SETTINGS]
+for k in missing_defaults:
+    SETTINGS[k] = DEFAULTS[k]
 
-for k, v in DEFAULTS.items():
-    if k not in SETTINGS:
-        SETTINGS[k] = v
+settings_writer = SettingsWriter(SETTINGS_FILE, SETTINGS, db=settings_db)
+atexit.register(settings_writer.flush)
 
-with open(SETTINGS_FILE, "w") as f:
-    json.dump(SETTINGS, f, indent=4)
+# Only touch the file (or database) on first run or when new defaults need persisting
+if not settings_loaded or missing_defaults:
+    settings_writer.write_now()
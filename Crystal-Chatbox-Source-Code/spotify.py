@@ -1,14 +1,13 @@
 import threading
 import time
 import os
+import importlib.util
 from settings import SETTINGS
+from rate_limit import get_budget, parse_retry_after
+from album_art import cache as album_art_cache, pick_image
 
-try:
-    import spotipy
-    from spotipy.oauth2 import SpotifyOAuth
-    SPOTIFY_AVAILABLE = True
-except ImportError:
-    SPOTIFY_AVAILABLE = False
+# spotipy (and requests under it) is imported only once credentials exist
+SPOTIFY_AVAILABLE = importlib.util.find_spec("spotipy") is not None
 
 spotify_state = {
     "song_text": "",
@@ -18,14 +17,156 @@ spotify_state = {
 }
 
 spotify_lock = threading.Lock()
+state_version = 0
 sp = None
+spotify_ready = threading.Event()
+# spotify_token.TokenCache, created with the first client; it outlives credential changes
+token_cache = None
+TOKEN_CACHE_PATH = ".spotify_cache"
+
+TRACKER_NAME = "Spotify Tracker"
+tracker_thread = None
+tracker_stop = threading.Event()
+
+SPOTIFY_KEYS = ("spotify_client_id", "spotify_client_secret", "spotify_redirect_uri")
+
+# Playback polling: position is extrapolated locally between these calls
+# A seek or pause in another client only shows up at the next poll, so up to
+# VERIFY_INTERVAL late; shortening it trades API calls for that latency
+VERIFY_INTERVAL = 10        # while playing, confirm the model this often
+IDLE_POLL_INTERVAL = 5      # while paused or nothing is playing
+RECHECK_DELAY = 2           # shortly after a seek, pause or resume
+TRACK_END_SLACK = 0.5       # poll this long after the track should have ended
+SEEK_TOLERANCE_MS = 1500    # drift beyond this counts as a seek
+
+class PlaybackModel:
+    """
+    Last known playback: the track, its position at a monotonic anchor
+    time and whether it is playing. position_ms() extrapolates from the
+    anchor, so current_playback() is only needed to confirm the model:
+    around the end of the track, every VERIFY_INTERVAL, or right after
+    observe() saw a seek, pause or resume.
+    """
+
+    def __init__(self):
+        self.track_id = None
+        self.is_playing = False
+        self.duration_ms = 0
+        self.anchor_ms = 0
+        self.anchor_at = 0.0
+        self.polls = 0
+
+    def position_ms(self, now=None):
+        if not self.is_playing:
+            return self.anchor_ms
+        now = time.monotonic() if now is None else now
+        return min(self.duration_ms, self.anchor_ms + int((now - self.anchor_at) * 1000))
+
+    def observe(self, current, now):
+        """
+        Re-anchor on a current_playback() response and return what changed:
+        "track", "seek", "pause", "resume" or None
+        """
+        item = current.get("item") if current else None
+        playing = bool(current and current.get("is_playing") and item)
+        track_id = (item.get("id") or item.get("uri") or item.get("name")) if item else None
+        progress = (current.get("progress_ms") or 0) if current else 0
+
+        if track_id != self.track_id:
+            change = "track"
+        elif playing != self.is_playing:
+            change = "resume" if playing else "pause"
+        elif playing and abs(progress - self.position_ms(now)) > SEEK_TOLERANCE_MS:
+            change = "seek"
+        else:
+            change = None
+
+        self.polls += 1
+        self.track_id = track_id
+        self.is_playing = playing
+        self.duration_ms = item.get("duration_ms", 0) if item else 0
+        self.anchor_ms = progress
+        self.anchor_at = now
+        return change
+
+    def next_poll_delay(self, change, now):
+        """Seconds until the model should be confirmed again"""
+        if change in ("seek", "pause", "resume"):
+            return RECHECK_DELAY
+        if not self.is_playing:
+            return IDLE_POLL_INTERVAL
+        remaining = (self.duration_ms - self.position_ms(now)) / 1000
+        return max(1.0, min(VERIFY_INTERVAL, remaining + TRACK_END_SLACK))
+
+playback = PlaybackModel()
+# Normal polling needs about 0.1 req/s; the budget only bites on error storms or bugs
+budget = get_budget("spotify", rate=0.5, burst=3, max_backoff=60)
+
+# Name of the local player (see mpris.py) currently filling spotify_state; the Web API is not polled meanwhile
+local_source = None
 
 def get_spotify_state():
     with spotify_lock:
         return spotify_state.copy()
 
+def set_local_source(name):
+    global local_source
+    if name != local_source:
+        print(f"[Spotify] Now playing source: {name or 'Web API'}")
+    local_source = name
+
+def apply_playback(current):
+    """
+    Re-anchor the playback model on a current_playback()-shaped dict (or
+    None) and copy its track metadata into spotify_state; returns the change
+    seen by PlaybackModel.observe()
+    """
+    global state_version
+    with spotify_lock:
+        change = playback.observe(current, time.monotonic())
+        previous = spotify_state.copy()
+        if playback.is_playing:
+            item = current["item"]
+            artists = ", ".join([artist["name"] for artist in item.get("artists", [])])
+            track_name = item.get("name", "Unknown")
+            spotify_state["song_text"] = f"{track_name} - {artists}"
+            spotify_state["song_dur"] = item.get("duration_ms", 0) // 1000
+
+            album = item.get("album", {})
+            art_url = pick_image(album.get("images", []))
+            if art_url and album.get("id"):
+                # Served from the local thumbnail cache instead of the full-size CDN image
+                album_art_cache.remember(album["id"], art_url)
+                spotify_state["album_art"] = f"/album_art/{album['id']}"
+            else:
+                spotify_state["album_art"] = art_url
+        else:
+            spotify_state["song_text"] = ""
+            spotify_state["song_dur"] = 0
+            spotify_state["album_art"] = ""
+        spotify_state["song_pos"] = playback.position_ms() // 1000 if playback.is_playing else 0
+        if spotify_state != previous:
+            state_version += 1
+    return change
+
+def advance_position():
+    """Move song_pos forward from the model, without asking any source"""
+    global state_version
+    if not playback.is_playing:
+        return
+    with spotify_lock:
+        pos = playback.position_ms() // 1000
+        if spotify_state["song_pos"] != pos:
+            spotify_state["song_pos"] = pos
+            state_version += 1
+
+def next_second_delay(now=None):
+    """Seconds until the extrapolated position reaches its next whole second"""
+    now = time.monotonic() if now is None else now
+    return (1000 - playback.position_ms(now) % 1000) / 1000
+
 def init_spotify_web():
-    global sp
+    global sp, token_cache
     if not SPOTIFY_AVAILABLE:
         print("[Spotify] spotipy library not available")
         return
@@ -37,74 +178,106 @@ def init_spotify_web():
     if not client_id or not client_secret:
         print("[Spotify] Missing client ID or secret, Spotify integration disabled")
         sp = None
+        spotify_ready.clear()
         return
     
     try:
+        import requests
+        import spotipy
+        from spotipy.oauth2 import SpotifyOAuth
         scope = "user-read-currently-playing user-read-playback-state"
-        sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
+        # A plain session: spotipy's default one retries 429/5xx internally and
+        # sleeps on them, which would hide Retry-After from the tracker's budget
+        from spotify_token import TokenCache
+        if token_cache is None:
+            token_cache = TokenCache(TOKEN_CACHE_PATH)
+        auth_manager = SpotifyOAuth(
             client_id=client_id,
             client_secret=client_secret,
             redirect_uri=redirect_uri,
             scope=scope,
-            cache_path=".spotify_cache",
+            cache_handler=token_cache,
             open_browser=False
-        ))
+        )
+        token_cache.attach(auth_manager)
+        sp = spotipy.Spotify(auth_manager=auth_manager, requests_session=requests.Session())
+        budget.reset()
+        spotify_ready.set()
         print("[Spotify] OAuth setup complete. Please visit the auth URL if needed.")
     except Exception as e:
         print(f"[Spotify Init Error] {e}")
         sp = None
+        spotify_ready.clear()
 
 def start_spotify_tracker(interval=1):
+    global tracker_thread
+    if tracker_thread is not None and tracker_thread.is_alive():
+        return
+    if tracker_thread is None:
+        SETTINGS.subscribe(SPOTIFY_KEYS, lambda key, value: init_spotify_web())
+    tracker_stop.clear()
+
     def tracker():
-        global spotify_state
         print("[Spotify Tracker] Thread started")
         last_error_time = 0
+        next_poll = 0.0
+
+        def backoff(e):
+            nonlocal last_error_time
+            status = getattr(e, "http_status", None)
+            headers = getattr(e, "headers", None) or {}
+            delay = budget.failure(e, status, parse_retry_after(headers.get("Retry-After")))
+            current_time = time.time()
+            if current_time - last_error_time > 60:
+                if status == 401:
+                    print("[Spotify] Not authenticated or token expired. Please connect to Spotify via the dashboard.")
+                else:
+                    print(f"[Spotify Tracker ERROR] {e} (retrying in {delay:.0f}s)")
+                last_error_time = current_time
+            return delay
         
-        while True:
+        while not tracker_stop.is_set():
             try:
-                if sp is None:
-                    time.sleep(interval)
+                if not spotify_ready.wait(interval) or sp is None:
                     continue
-                
-                try:
-                    current = sp.current_playback()
-                except spotipy.exceptions.SpotifyException as e:
-                    if e.http_status == 401:
-                        current_time = time.time()
-                        if current_time - last_error_time > 60:
-                            print("[Spotify] Not authenticated or token expired. Please connect to Spotify via the dashboard.")
-                            last_error_time = current_time
-                        time.sleep(5)
-                        continue
-                    else:
-                        raise
-                
-                with spotify_lock:
-                    if current and current.get("is_playing") and current.get("item"):
-                        item = current["item"]
-                        artists = ", ".join([artist["name"] for artist in item.get("artists", [])])
-                        track_name = item.get("name", "Unknown")
-                        spotify_state["song_text"] = f"{track_name} - {artists}"
-                        spotify_state["song_pos"] = current.get("progress_ms", 0) // 1000
-                        spotify_state["song_dur"] = item.get("duration_ms", 0) // 1000
-                        
-                        images = item.get("album", {}).get("images", [])
-                        if images:
-                            spotify_state["album_art"] = images[0].get("url", "")
-                        else:
-                            spotify_state["album_art"] = ""
+                if local_source is not None:
+                    tracker_stop.wait(1)
+                    continue
+
+                now = time.monotonic()
+                if now >= next_poll and budget.acquire():
+                    try:
+                        current = sp.current_playback()
+                    except Exception as e:
+                        next_poll = time.monotonic() + backoff(e)
                     else:
-                        spotify_state["song_text"] = ""
-                        spotify_state["song_pos"] = 0
-                        spotify_state["song_dur"] = 0
-                        spotify_state["album_art"] = ""
-                
-                time.sleep(interval)
+                        budget.success()
+                        change = apply_playback(current)
+                        now = time.monotonic()
+                        next_poll = now + playback.next_poll_delay(change, now)
+                else:
+                    if now >= next_poll:
+                        next_poll = now + budget.delay()
+                    advance_position()
+
+                # Wake on the next whole second of playback, or for the next poll
+                now = time.monotonic()
+                wake = next_poll
+                if playback.is_playing:
+                    wake = min(wake, now + next_second_delay(now))
+                tracker_stop.wait(max(0.05, wake - now))
             except Exception as e:
                 current_time = time.time()
                 if current_time - last_error_time > 60:
                     print(f"[Spotify Tracker ERROR] {e}")
                     last_error_time = current_time
-                time.sleep(interval)
+                tracker_stop.wait(interval)
     
-    threading.Thread(target=tracker, daemon=True).start()
+    tracker_thread = threading.Thread(target=tracker, name=TRACKER_NAME, daemon=True)
+    tracker_thread.start()
+
+def stop_spotify_tracker(timeout=5):
+    """Ask the tracker thread to exit and wait for it; start_spotify_tracker() starts it again"""
+    tracker_stop.set()
+    if tracker_thread is not None:
+        tracker_thread.join(timeout)
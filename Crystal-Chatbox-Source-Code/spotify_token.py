@@ -0,0 +1,152 @@
+"""
+Spotify Token Cache
+In-memory spotipy cache handler with proactive refresh and write-behind persistence
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from spotipy.cache_handler import CacheHandler
+from spotipy.oauth2 import SpotifyOauthError
+
+from settings import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# spotipy refreshes inline once a token is within 60 s of expiry; refreshing
+# earlier on our own thread means the tracker never waits on the token endpoint
+REFRESH_MARGIN = 300
+RETRY_DELAY = 30
+# OAuth errors that retrying cannot fix; the user has to connect Spotify again
+FATAL_OAUTH_ERRORS = frozenset({"invalid_grant", "invalid_client", "unauthorized_client"})
+
+
+class TokenCache(CacheHandler):
+    """
+    Holds the token in memory, so get_cached_token() (called by spotipy
+    before every API request) never touches the disk. The file is read once
+    at startup and rewritten from a background thread only when
+    save_token_to_cache() receives a different token. The same thread
+    refreshes the token REFRESH_MARGIN seconds before it expires, retrying
+    every RETRY_DELAY seconds while the token is still valid. Once it has
+    expired, or the token endpoint rejected the refresh token outright, the
+    thread leaves it to spotipy's inline refresh and the OAuth flow until a
+    new token or auth manager arrives.
+    """
+
+    def __init__(self, path, name="Spotify Token"):
+        self.path = path
+        self.name = name
+        self.auth_manager = None
+        self._cond = threading.Condition()
+        self._token = self._load()
+        self._dirty = False
+        self._not_before = 0.0
+        self._rejected = False
+        self._thread = None
+        self.stats = {"refreshes": 0, "refresh_failures": 0, "writes": 0, "last_error": ""}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Could not read Spotify token cache: {e}")
+            return None
+
+    def get_cached_token(self):
+        with self._cond:
+            return dict(self._token) if self._token else None
+
+    def save_token_to_cache(self, token_info):
+        with self._cond:
+            if token_info == self._token:
+                return
+            self._token = dict(token_info)
+            self._dirty = True
+            self._rejected = False
+            self._cond.notify_all()
+
+    def attach(self, auth_manager):
+        """Use auth_manager for proactive refreshes and start the thread"""
+        with self._cond:
+            self.auth_manager = auth_manager
+            self._not_before = 0.0
+            self._rejected = False
+            self._cond.notify_all()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _refresh_due(self):
+        token = self._token
+        if self.auth_manager is None or self._rejected or not token or not token.get("refresh_token"):
+            return None
+        expires_at = token.get("expires_at", 0)
+        if expires_at <= time.time():
+            return None
+        return max(expires_at - REFRESH_MARGIN, self._not_before)
+
+    def _write(self, token):
+        try:
+            atomic_write_text(self.path, json.dumps(token))
+        except Exception as e:
+            with self._cond:
+                self.stats["last_error"] = str(e)
+            logger.error(f"Could not save Spotify token cache: {e}")
+            return
+        with self._cond:
+            self.stats["writes"] += 1
+
+    def _refresh(self, auth_manager, token):
+        try:
+            # Calls save_token_to_cache() with the new token, which queues the write
+            auth_manager.refresh_access_token(token["refresh_token"])
+        except Exception as e:
+            fatal = isinstance(e, SpotifyOauthError) and e.error in FATAL_OAUTH_ERRORS
+            with self._cond:
+                self.stats["refresh_failures"] += 1
+                self.stats["last_error"] = str(e)
+                # Unless a new token arrived meanwhile, stop until the user reconnects
+                if fatal and token == self._token:
+                    self._rejected = True
+            if fatal:
+                print(f"[Spotify] Token refresh rejected ({e.error}). Please connect to Spotify via the dashboard.")
+            else:
+                print(f"[Spotify] Token refresh failed, retrying in {RETRY_DELAY}s: {e}")
+            return
+        with self._cond:
+            self.stats["refreshes"] += 1
+
+    def _run(self):
+        print(f"[{self.name}] Thread started")
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    due = self._refresh_due()
+                    remaining = None if due is None else due - time.time()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                token = dict(self._token)
+                auth_manager = self.auth_manager
+                refresh = not self._dirty
+                if refresh:
+                    # Also spaces out attempts when a fresh token is already inside the margin
+                    self._not_before = time.time() + RETRY_DELAY
+                self._dirty = False
+            if refresh:
+                self._refresh(auth_manager, token)
+            else:
+                self._write(token)
+
+    def get_stats(self):
+        with self._cond:
+            stats = dict(self.stats)
+            stats["expires_at"] = (self._token or {}).get("expires_at")
+            stats["pending_write"] = self._dirty
+        return stats
@@ -0,0 +1,82 @@
+"""
+Startup Profiler
+Per-module import timing and resident memory for --profile-startup
+"""
+import builtins
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_mb():
+    """Current resident set size in MiB, or None where it cannot be read"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux, bytes on macOS; this is the peak, not current
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+class ImportProfiler:
+    """
+    Wraps __import__ while installed and records, for every module imported
+    for the first time, its cumulative time and its self time (cumulative
+    minus the first-time imports it triggered). Each thread keeps its own
+    stack, so imports running concurrently in background threads are not
+    subtracted from whatever the main thread happens to be importing.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._local = threading.local()
+        self._original = None
+
+    def install(self):
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.records.append((name, len(stack), elapsed, elapsed - children))
+
+    def report(self, top=20):
+        lines = [f"{'cumulative ms':>14}{'self ms':>10}  module"]
+        for name, depth, total, own in sorted(self.records, key=lambda r: r[2], reverse=True)[:top]:
+            lines.append(f"{total * 1000:>14.1f}{own * 1000:>10.1f}  {'  ' * depth}{name}")
+        lines.append(f"{len(self.records)} modules imported")
+        return "\n".join(lines)
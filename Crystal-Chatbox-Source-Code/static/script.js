@@ -1,6 +1,11 @@
 let refreshInterval = (window.CONFIG && window.CONFIG.refresh_interval) || 1;
 let updateTimer;
+let statusEvents = null;
+let statusCache = {};
+let statusVersion = null;
+let statusETag = null;
 let customMessages = [];
+let savedPerMessageIntervals = {};
 
 document.addEventListener('DOMContentLoaded', () => {
     setupTabs();
@@ -203,21 +208,17 @@ function setupAdvanced() {
         const windowEmoji = document.getElementById('window_emoji').value;
         const heartrateEmoji = document.getElementById('heartrate_emoji').value;
         
-        await fetch('/save_emoji_settings', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ 
-                time_emoji: timeEmoji,
-                song_emoji: songEmoji,
-                window_emoji: windowEmoji,
-                heartrate_emoji: heartrateEmoji
-            })
+        const result = await patchSettings({
+            time_emoji: timeEmoji || '⏰',
+            song_emoji: songEmoji || '🎶',
+            window_emoji: windowEmoji || '💻',
+            heartrate_emoji: heartrateEmoji || '❤️'
         });
-        alert('Emojis saved successfully!');
+        alert(result.ok ? 'Emojis saved successfully!' : 'Emojis can be at most 5 characters each.');
     });
     
     document.getElementById('toggle_patreon_btn').addEventListener('click', async () => {
-        const response = await fetch('/status');
+        const response = await fetch('/status?view=config');
         const data = await response.json();
         const isSupporter = data.patreon_supporter;
         
@@ -526,7 +527,7 @@ async function loadProfiles() {
 
 async function updateAdvancedButtons() {
     try {
-        const response = await fetch('/status');
+        const response = await fetch('/status?view=config');
         const data = await response.json();
         
         const randomOrderBtn = document.getElementById('random_order_btn');
@@ -548,7 +549,7 @@ async function updateAdvancedButtons() {
 
 async function updateMessageWeightsVisibility() {
     try {
-        const response = await fetch('/status');
+        const response = await fetch('/status?view=config');
         const data = await response.json();
         const weightsSection = document.getElementById('message_weights_section');
         
@@ -577,7 +578,7 @@ function setupProgressStyle() {
 
 async function loadCustomMessages() {
     try {
-        const response = await fetch('/status');
+        const response = await fetch('/status?view=config');
         const data = await response.json();
         customMessages = data.custom_texts || [];
         renderInlineMessages();
@@ -684,10 +685,11 @@ async function loadPerMessageTimings() {
     if (!container) return;
     
     try {
-        const response = await fetch('/status');
+        const response = await fetch('/status?view=config');
         const data = await response.json();
         customMessages = data.custom_texts || [];
         const savedIntervals = data.per_message_intervals || {};
+        savedPerMessageIntervals = savedIntervals;
         
         container.innerHTML = '';
         
@@ -719,16 +721,23 @@ async function loadPerMessageTimings() {
 async function savePerMessageTimings() {
     const inputs = document.querySelectorAll('#per_message_timing_container input');
     const intervals = {};
+    // Entries for messages that no longer exist are sent as null so the server drops them
+    Object.keys(savedPerMessageIntervals).forEach(index => {
+        intervals[index] = null;
+    });
     inputs.forEach(input => {
-        intervals[input.dataset.index] = parseInt(input.value) || 3;
+        intervals[input.dataset.index] = Number(input.value);
     });
     
     try {
-        await fetch('/save_per_message_intervals', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ intervals })
-        });
+        const result = await patchSettings({ per_message_intervals: intervals });
+        if (result.ok) {
+            savedPerMessageIntervals = Object.fromEntries(
+                Object.entries(intervals).filter(([, interval]) => interval !== null));
+        } else {
+            const reason = (result.errors && result.errors.per_message_intervals) || result.error;
+            alert('Per-message timings were not saved: ' + reason);
+        }
     } catch (error) {
         console.error('Error saving timings:', error);
     }
@@ -739,7 +748,7 @@ async function loadMessageWeights() {
     if (!container) return;
     
     try {
-        const response = await fetch('/status');
+        const response = await fetch('/status?view=config');
         const data = await response.json();
         customMessages = data.custom_texts || [];
         const savedWeights = data.weighted_messages || {};
@@ -761,13 +770,8 @@ async function loadMessageWeights() {
             input.style.cssText = 'width:80px;';
             input.dataset.index = idx;
             input.addEventListener('change', async () => {
-                await fetch('/set_message_weight', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ 
-                        index: parseInt(input.dataset.index), 
-                        weight: parseInt(input.value) 
-                    })
+                await patchSettings({
+                    weighted_messages: { [input.dataset.index]: Math.max(1, parseInt(input.value) || 1) }
                 });
             });
             
@@ -872,11 +876,40 @@ function applyPremiumStyling(customBackground, customButtonColor) {
     }
 }
 
+// Apply several settings in one request; dict settings are merged, null removes an entry
+async function patchSettings(changes) {
+    const response = await fetch('/settings', {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(changes)
+    });
+    const data = await response.json();
+    if (!data.ok) {
+        console.error('Settings rejected:', data.errors || data.error);
+    }
+    return data;
+}
+
 async function updateStatus() {
+    // While the event stream is open the server pushes every change itself
+    if (statusEvents && statusEvents.readyState === EventSource.OPEN) return;
     try {
-        const response = await fetch('/status');
+        const url = statusVersion === null ? '/status' : `/status?since=${statusVersion}`;
+        const headers = statusETag ? { 'If-None-Match': statusETag } : {};
+        const response = await fetch(url, { headers });
+        if (response.status === 304) return;
         const data = await response.json();
-        
+        statusETag = response.headers.get('ETag');
+        statusVersion = data.version;
+        Object.assign(statusCache, data);
+        renderStatus(statusCache);
+    } catch (error) {
+        console.error('Error updating status:', error);
+    }
+}
+
+function renderStatus(data) {
+    try {
         document.getElementById('chatbox_status').textContent = data.chatbox ? 'ON' : 'OFF';
         document.getElementById('time_status').textContent = data.time_on ? data.time : 'OFF';
         document.getElementById('custom_status').textContent = data.custom_on ? data.custom : 'OFF';
@@ -886,6 +919,7 @@ async function updateStatus() {
         document.getElementById('weather_status').textContent = data.weather_on ? data.weather : 'OFF';
         document.getElementById('last_msg').textContent = data.last_message || '---';
         document.getElementById('preview').textContent = data.preview || 'Preview will show here.';
+        renderProviderStatus(data.providers);
         
         const albumArt = document.getElementById('album_art');
         if (data.album_art) {
@@ -920,17 +954,32 @@ async function updateStatus() {
             document.body.className = classes.join(' ');
         }
         
-        updateDisplayOptionButtons();
+        updateDisplayOptionButtons(data);
         
     } catch (error) {
-        console.error('Error updating status:', error);
+        console.error('Error rendering status:', error);
     }
 }
 
-async function updateDisplayOptionButtons() {
+function renderProviderStatus(providers) {
+    const el = document.getElementById('provider_status');
+    if (!el || !providers) return;
+    const lines = Object.entries(providers).map(([name, p]) => {
+        const label = name.charAt(0).toUpperCase() + name.slice(1);
+        if (p.state !== 'backoff') return `${label}: OK`;
+        const reason = p.last_status ? `HTTP ${p.last_status}` : (p.last_error || 'error');
+        const hint = p.retry_after != null ? ', Retry-After' : '';
+        return `${label}: backing off ${p.retry_in}s (${reason}${hint}, ${p.failures} in a row)`;
+    });
+    el.textContent = lines.length ? lines.join('\n') : '---';
+}
+
+async function updateDisplayOptionButtons(data) {
     try {
-        const response = await fetch('/status');
-        const data = await response.json();
+        if (!data) {
+            const response = await fetch('/status?view=config');
+            data = await response.json();
+        }
         
         const themeBtn = document.getElementById('toggle_theme_btn');
         const streamerBtn = document.getElementById('toggle_streamer_btn');
@@ -962,12 +1011,44 @@ function updateButton(id, isOn) {
     }
 }
 
-function startUpdate() {
+function startPolling() {
     updateStatus();
     if (updateTimer) clearInterval(updateTimer);
     updateTimer = setInterval(updateStatus, refreshInterval * 1000);
 }
 
+function startUpdate() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    
+    statusEvents = new EventSource('/events');
+    
+    statusEvents.addEventListener('snapshot', (e) => {
+        if (updateTimer) {
+            clearInterval(updateTimer);
+            updateTimer = null;
+        }
+        statusCache = JSON.parse(e.data);
+        statusVersion = Number(e.lastEventId);
+        statusETag = null;
+        renderStatus(statusCache);
+    });
+    
+    statusEvents.addEventListener('update', (e) => {
+        Object.assign(statusCache, JSON.parse(e.data));
+        statusVersion = Number(e.lastEventId);
+        statusETag = null;
+        renderStatus(statusCache);
+    });
+    
+    statusEvents.onerror = () => {
+        // EventSource reconnects on its own; poll until the next snapshot arrives
+        if (!updateTimer) startPolling();
+    };
+}
+
 function setupLayout() {
     const list = document.getElementById('layout_list');
     let draggedItem = null;
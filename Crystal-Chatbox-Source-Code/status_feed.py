@@ -0,0 +1,141 @@
+"""
+Status Feed
+Builds the dashboard status snapshot once for all Server-Sent Events subscribers
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_SECONDS = 15
+
+
+def format_event(event, data, event_id=None):
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class StatusFeed:
+    """
+    One background thread rebuilds the snapshot every interval seconds (or
+    immediately after poke()) while at least one subscriber is connected, and
+    bumps the version when any field changed. Subscribers block in
+    wait_for_change() and diff against whatever they last sent.
+
+    The version is shared with /status: refresh() rebuilds on demand, the
+    per-key versions let changes_since() answer ?since= deltas, and etag()
+    ties a version to this process so a restart never yields a false 304.
+    """
+
+    def __init__(self, build_snapshot, interval=1.0, name="Status Feed"):
+        self.name = name
+        self.interval = interval
+        self._build = build_snapshot
+        self._cond = threading.Condition()
+        # Serializes build + install, so a slow build never replaces a newer snapshot
+        self._build_lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+        self._key_versions = {}
+        self._boot_id = os.urandom(4).hex()
+        self._subscribers = 0
+        self._poked = False
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def poke(self):
+        """Rebuild right away, e.g. after a settings change"""
+        with self._cond:
+            self._poked = True
+            self._cond.notify_all()
+
+    def subscribe(self):
+        self.start()
+        with self._cond:
+            self._subscribers += 1
+            self._cond.notify_all()
+        return self.current()
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    def current(self):
+        """Return (version, snapshot), building the first snapshot if needed"""
+        with self._cond:
+            if self._snapshot is not None:
+                return self._version, self._snapshot
+        return self.refresh()
+
+    def wait_for_change(self, version, timeout=KEEPALIVE_SECONDS):
+        """Block until the version moves past version or timeout expires"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._version == version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._version, self._snapshot
+
+    def refresh(self):
+        """Rebuild the snapshot now and return (version, snapshot)"""
+        with self._build_lock:
+            try:
+                snapshot = self._build()
+            except Exception as e:
+                logger.error(f"Status snapshot failed: {e}")
+                snapshot = None
+            with self._cond:
+                if snapshot is not None and snapshot != self._snapshot:
+                    previous = self._snapshot or {}
+                    self._version += 1
+                    for key, value in snapshot.items():
+                        if key not in previous or previous[key] != value:
+                            self._key_versions[key] = self._version
+                    self._snapshot = snapshot
+                    self._cond.notify_all()
+                return self._version, self._snapshot
+
+    def changes_since(self, version):
+        """
+        Return (current_version, changed_fields) for fields that changed after
+        version, or (current_version, None) if version is not from this feed
+        """
+        with self._cond:
+            if version < 0 or version > self._version:
+                return self._version, None
+            changed = {
+                key: self._snapshot[key]
+                for key, key_version in self._key_versions.items()
+                if key_version > version and key in self._snapshot
+            }
+            return self._version, changed
+
+    def etag(self, version, variant=""):
+        return f"{self._boot_id}-{version}{'-' + variant if variant else ''}"
+
+    def _run(self):
+        print(f"[{self.name}] Thread started")
+        while True:
+            with self._cond:
+                while self._subscribers == 0 and not self._poked:
+                    self._cond.wait()
+                if not self._poked:
+                    self._cond.wait(self.interval)
+                self._poked = False
+            self.refresh()
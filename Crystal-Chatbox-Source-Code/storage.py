@@ -0,0 +1,243 @@
+"""
+SQLite Storage
+Optional WAL-mode database for settings, profiles and sent-message history
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DB_FILE = os.environ.get("CHATBOX_DB", "chatbox.db")
+HISTORY_LIMIT = 10000
+HISTORY_PRUNE_EVERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS send_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sent_at REAL NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS send_history_sent_at ON send_history (sent_at);
+"""
+
+
+class Database:
+    """
+    One shared connection guarded by a lock. WAL lets the dashboard read
+    while the sender thread appends history, and synchronous=NORMAL keeps
+    commits cheap without risking corruption on power loss.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._inserts = 0
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # Meta
+
+    def get_meta(self, key):
+        rows = self.query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_meta(self, key, value):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # Settings
+
+    def load_settings(self):
+        return {key: json.loads(value) for key, value in self.query("SELECT key, value FROM settings")}
+
+    def write_settings(self, encoded, deleted=()):
+        """Upsert only the changed keys (already JSON-encoded) in one transaction"""
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                list(encoded.items())
+            )
+            if deleted:
+                conn.executemany("DELETE FROM settings WHERE key = ?", [(key,) for key in deleted])
+
+    # Send history
+
+    def record_send(self, message, sent_at=None):
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO send_history (sent_at, message) VALUES (?, ?)",
+                (sent_at or time.time(), message)
+            )
+            self._inserts += 1
+            if self._inserts % HISTORY_PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM send_history WHERE id <= "
+                    "(SELECT MAX(id) FROM send_history) - ?", (HISTORY_LIMIT,)
+                )
+
+    def send_history(self, limit=50, before=None):
+        """Newest first; pass the oldest sent_at seen as before to page back"""
+        if before is None:
+            rows = self.query(
+                "SELECT sent_at, message FROM send_history ORDER BY sent_at DESC LIMIT ?", (limit,))
+        else:
+            rows = self.query(
+                "SELECT sent_at, message FROM send_history WHERE sent_at < ? "
+                "ORDER BY sent_at DESC LIMIT ?", (before, limit))
+        return [{"sent_at": sent_at, "message": message} for sent_at, message in rows]
+
+    # Migration
+
+    def migrate_json(self, name, path, rows):
+        """
+        Import a JSON file once, on the first run with SQLite. rows(data)
+        yields (table, key, encoded_value) tuples; the meta flag is written in
+        the same transaction so an interrupted import is simply retried.
+        """
+        flag = f"migrated_{name}"
+        if self.get_meta(flag):
+            return 0
+        data = None
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except Exception as e:
+                logger.error(f"Could not migrate {path}: {e}")
+        imported = list(rows(data)) if data is not None else []
+        with self.transaction() as conn:
+            for table, key, value in imported:
+                conn.execute(f"INSERT OR REPLACE INTO {table} VALUES (?, ?)", (key, value))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (flag, str(time.time())))
+        if imported:
+            print(f"[Storage] Migrated {len(imported)} {name} from {path} into {self.path}")
+        return len(imported)
+
+
+class _Transaction:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db._lock.acquire()
+        self.db._conn.execute("BEGIN IMMEDIATE")
+        return self.db._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.db._lock.release()
+        return False
+
+
+class ProfileTable:
+    """
+    SQLite counterpart of profiles_manager.ProfileStore: one row per profile,
+    so a save or switch rewrites a single row inside one transaction.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def all(self):
+        return [json.loads(data) for (data,) in self.db.query("SELECT data FROM profiles ORDER BY rowid")]
+
+    def names(self):
+        return [name for (name,) in self.db.query("SELECT name FROM profiles ORDER BY rowid")]
+
+    def get(self, name):
+        rows = self.db.query("SELECT data FROM profiles WHERE name = ?", (name,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def put(self, profile, create_only=False, update_only=False):
+        name = profile["name"]
+        try:
+            with self.db.transaction() as conn:
+                exists = conn.execute("SELECT 1 FROM profiles WHERE name = ?", (name,)).fetchone()
+                if (create_only and exists) or (update_only and not exists):
+                    return False
+                conn.execute(
+                    "INSERT INTO profiles (name, data) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET data = excluded.data",
+                    (name, json.dumps(profile))
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Error saving profile: {e}")
+            return False
+        return True
+
+    def update(self, name, **fields):
+        try:
+            with self.db.transaction() as conn:
+                row = conn.execute("SELECT data FROM profiles WHERE name = ?", (name,)).fetchone()
+                if row is None:
+                    return False
+                profile = dict(json.loads(row[0]), **fields)
+                conn.execute("UPDATE profiles SET data = ? WHERE name = ?", (json.dumps(profile), name))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Error saving profile: {e}")
+            return False
+        return True
+
+    def delete(self, name):
+        try:
+            with self.db.transaction() as conn:
+                conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+        except sqlite3.Error as e:
+            logger.error(f"Error deleting profile: {e}")
+            return False
+        return True
+
+    def replace_all(self, profiles):
+        try:
+            with self.db.transaction() as conn:
+                conn.execute("DELETE FROM profiles")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO profiles (name, data) VALUES (?, ?)",
+                    [(p.get("name", "Unnamed"), json.dumps(p)) for p in profiles]
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Error saving profiles: {e}")
+            return False
+        return True
+
+
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """Open (and create) the database on first use"""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = Database(DB_FILE)
+    return _db
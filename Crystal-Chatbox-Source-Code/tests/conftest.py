@@ -0,0 +1,11 @@
+"""
+Test setup: the app modules are flat and import each other by name, and
+settings.py reads/writes settings.json in the working directory on import,
+so run from a throwaway directory with the source tree on sys.path.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix="crystal-tests-"))
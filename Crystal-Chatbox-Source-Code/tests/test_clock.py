@@ -0,0 +1,29 @@
+"""
+The named clock table stays bounded however many zones custom texts mention
+"""
+from collections import OrderedDict
+
+import pytest
+
+pytest.importorskip("pytz")
+
+import clock
+
+
+@pytest.fixture
+def empty_table(monkeypatch):
+    monkeypatch.setattr(clock, "_clocks", OrderedDict())
+    monkeypatch.setattr(clock, "MAX_CLOCKS", 3)
+
+
+def test_least_recently_used_clocks_are_evicted(empty_table):
+    tokyo = clock.get_clock("Asia/Tokyo")
+    for name in ("Europe/Paris", "Not/AZone", "America/New_York"):
+        clock.get_clock(name)
+        # Tokyo stays in use on every tick, so the others are evicted first
+        assert clock.get_clock("Asia/Tokyo") is tokyo
+    assert list(clock._clocks) == ["Not/AZone", "America/New_York", "Asia/Tokyo"]
+
+    clock.refresh_all()
+    assert clock.time_text("Europe/Paris")
+    assert len(clock._clocks) == 3
@@ -0,0 +1,157 @@
+"""
+MPRIS translation and player selection, driven with fake player proxies
+instead of a session bus
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import spotify
+from mpris import MPRIS_PREFIX, MPRISTracker, playback_from_mpris
+
+
+def variants(**values):
+    """MPRIS metadata as dbus-next hands it over: a dict of objects with .value"""
+    return {key.replace("_", ":", 1): SimpleNamespace(value=value) for key, value in values.items()}
+
+
+def song(title, trackid="/track/1", artists=("Band",), length_us=200_000_000, art=""):
+    return variants(xesam_title=title, mpris_trackid=trackid, xesam_artist=list(artists),
+                    mpris_length=length_us, mpris_artUrl=art)
+
+
+class FakePlayer:
+    """The subset of the org.mpris.MediaPlayer2.Player proxy the tracker calls"""
+
+    def __init__(self, status="Playing", metadata=None, position_us=0):
+        self.status = status
+        self.metadata = metadata if metadata is not None else song("Song")
+        self.position_us = position_us
+
+    async def get_playback_status(self):
+        return self.status
+
+    async def get_metadata(self):
+        return self.metadata
+
+    async def get_position(self):
+        return self.position_us
+
+
+@pytest.fixture(autouse=True)
+def fresh_playback(monkeypatch):
+    """Give every test its own playback model and spotify_state"""
+    monkeypatch.setattr(spotify, "playback", spotify.PlaybackModel())
+    monkeypatch.setattr(spotify, "spotify_state", dict(spotify.spotify_state, song_text="", song_pos=0))
+    monkeypatch.setattr(spotify, "local_source", None)
+
+
+def tracker_with(**players):
+    tracker = MPRISTracker(name="Test MPRIS")
+    tracker._players = {MPRIS_PREFIX + name: player for name, player in players.items()}
+    return tracker
+
+
+def refresh(tracker):
+    asyncio.run(tracker._refresh())
+
+
+def test_translates_metadata_to_current_playback_shape():
+    current = playback_from_mpris("vlc", song("Song", artists=("A", "B"), art="https://i.scdn.co/image/x"),
+                                  "Playing", 42_500_000)
+    assert current["is_playing"] is True
+    assert current["progress_ms"] == 42_500
+    item = current["item"]
+    assert item["id"] == "vlc:/track/1"
+    assert item["name"] == "Song"
+    assert item["artists"] == [{"name": "A"}, {"name": "B"}]
+    assert item["duration_ms"] == 200_000
+    assert item["album"]["images"] == [{"url": "https://i.scdn.co/image/x"}]
+    assert item["album"]["id"].startswith("mpris-")
+
+
+def test_translation_edge_cases():
+    assert playback_from_mpris("vlc", song("Song"), "Paused", 0) is None
+    assert playback_from_mpris("vlc", {}, "Playing", 0) is None
+    # Local covers cannot be served, a bare string artist is accepted, untitled tracks fall back
+    current = playback_from_mpris("vlc", variants(xesam_artist="Solo", mpris_artUrl="file:///tmp/c.png"),
+                                  "Playing", -5)
+    assert current["item"]["album"] == {"images": []}
+    assert current["item"]["artists"] == [{"name": "Solo"}]
+    assert current["item"]["name"] == "Unknown"
+    assert current["progress_ms"] == 0
+
+
+def test_prefers_spotify_then_bus_name_order():
+    tracker = tracker_with(vlc=FakePlayer(metadata=song("From VLC")),
+                           mpv=FakePlayer(metadata=song("From mpv")),
+                           spotify=FakePlayer(metadata=song("From Spotify")))
+    refresh(tracker)
+    assert spotify.local_source == "spotify"
+    assert spotify.get_spotify_state()["song_text"] == "From Spotify - Band"
+
+    tracker._players[MPRIS_PREFIX + "spotify"].status = "Paused"
+    refresh(tracker)
+    assert spotify.local_source == "mpv"
+    assert spotify.get_spotify_state()["song_text"] == "From mpv - Band"
+
+
+def test_hands_back_to_web_api_on_pause():
+    player = FakePlayer()
+    tracker = tracker_with(vlc=player)
+    refresh(tracker)
+    assert spotify.local_source == "vlc"
+
+    player.status = "Paused"
+    refresh(tracker)
+    assert spotify.local_source is None
+    assert spotify.get_spotify_state()["song_text"] == ""
+
+
+def test_hands_back_to_web_api_when_player_exits():
+    tracker = tracker_with(vlc=FakePlayer())
+
+    async def scenario():
+        await tracker._refresh()
+        assert spotify.local_source == "vlc"
+        tracker._on_name_owner_changed(MPRIS_PREFIX + "vlc", ":1.42", "")
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert tracker._players == {}
+    assert spotify.local_source is None
+
+
+def test_player_exiting_mid_refresh_is_skipped():
+    tracker = MPRISTracker(name="Test MPRIS")
+    name = MPRIS_PREFIX + "vlc"
+
+    class ExitingPlayer(FakePlayer):
+        async def get_playback_status(self):
+            tracker._players.pop(name, None)
+            return "Playing"
+
+    tracker._players[name] = ExitingPlayer()
+    refresh(tracker)
+    assert spotify.local_source is None
+
+
+def test_zero_position_is_only_ignored_for_spotify(monkeypatch):
+    spotify_player = FakePlayer(position_us=30_000_000)
+    tracker = tracker_with(spotify=spotify_player)
+    refresh(tracker)
+    # Pretend five seconds have passed since the anchor
+    spotify.playback.anchor_at -= 5
+    spotify_player.position_us = 0
+    refresh(tracker)
+    assert 34_000 <= spotify.playback.position_ms() <= 36_000
+
+    vlc_player = FakePlayer(position_us=30_000_000)
+    monkeypatch.setattr(spotify, "playback", spotify.PlaybackModel())
+    tracker = tracker_with(vlc=vlc_player)
+    refresh(tracker)
+    vlc_player.position_us = 0
+    refresh(tracker)
+    assert spotify.playback.position_ms() < 1000
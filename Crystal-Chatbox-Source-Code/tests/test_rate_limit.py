@@ -0,0 +1,131 @@
+"""
+Request budgets, and the Spotify tracker against a fake Web API that
+answers with 429 (Retry-After) and 5xx bursts before recovering
+"""
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+import rate_limit
+from rate_limit import RequestBudget, parse_retry_after
+
+PLAYING = {
+    "is_playing": True,
+    "progress_ms": 1000,
+    "item": {"id": "t1", "name": "Song", "duration_ms": 600000, "artists": [{"name": "Band"}], "album": {}}
+}
+
+
+class FakeSpotify(http.server.ThreadingHTTPServer):
+    """Serves /v1/me/player from a script of (status, headers) per call; then 200s"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = []
+        super().__init__(("127.0.0.1", 0), FakeSpotifyHandler)
+
+    @property
+    def prefix(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/"
+
+
+class FakeSpotifyHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.calls.append(time.monotonic())
+        status, headers = server.script.pop(0) if server.script else (200, {})
+        body = json.dumps(PLAYING if status == 200 else {"error": {"status": status, "message": "storm"}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    """Always take the top of the jitter range so delays are predictable"""
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda low, high: high)
+
+
+def test_backoff_grows_exponentially_up_to_max(no_jitter):
+    budget = RequestBudget("test", base=1, max_backoff=10)
+    assert [round(budget.failure("boom"), 3) for _ in range(5)] == [2, 4, 8, 10, 10]
+    budget.success()
+    assert budget.failure("boom") == 2
+
+
+def test_retry_after_is_honoured_beyond_max_backoff(no_jitter):
+    budget = RequestBudget("test", base=1, max_backoff=60)
+    assert budget.failure("rate limited", 429, retry_after=3600) == 3600
+    state = budget.get_state()
+    assert state["state"] == "backoff"
+    assert 3590 < state["retry_in"] <= 3600
+    assert not budget.acquire()
+
+
+def test_token_bucket_limits_bursts():
+    budget = RequestBudget("test", rate=1, burst=3)
+    assert [budget.acquire() for _ in range(4)] == [True, True, True, False]
+    assert 0 < budget.delay() <= 1
+    assert budget.get_state()["throttled"] == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    http_date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert 25 < parse_retry_after(http_date) <= 30
+
+
+def test_spotify_tracker_backs_off_under_error_storm(no_jitter, monkeypatch):
+    requests = pytest.importorskip("requests")
+    spotipy = pytest.importorskip("spotipy")
+    import spotify
+
+    server = FakeSpotify(
+        [(429, {"Retry-After": "2"})] * 2
+        + [(503, {})] * 3
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = spotipy.Spotify(auth="token", requests_session=requests.Session())
+    client.prefix = server.prefix
+    # The tracker reads these module globals on every pass; monkeypatch puts the originals back
+    monkeypatch.setattr(spotify, "budget", RequestBudget("spotify", rate=0.5, burst=3, base=0.1, max_backoff=60))
+    monkeypatch.setattr(spotify, "playback", spotify.PlaybackModel())
+    monkeypatch.setattr(spotify, "spotify_state", dict(spotify.spotify_state))
+    monkeypatch.setattr(spotify, "sp", client)
+    try:
+        spotify.spotify_ready.set()
+        spotify.start_spotify_tracker()
+
+        deadline = time.monotonic() + 20
+        while len(server.calls) < 6 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(1)
+    finally:
+        spotify.spotify_ready.clear()
+        spotify.stop_spotify_tracker()
+        server.shutdown()
+        server.server_close()
+    assert not spotify.tracker_thread.is_alive()
+
+    # Five failures then one success, and the success ends the storm (next poll is seconds away)
+    assert len(server.calls) == 6
+    gaps = [b - a for a, b in zip(server.calls, server.calls[1:])]
+    # 429s wait out Retry-After although their own backoff (0.2 s, 0.4 s) is shorter
+    assert gaps[0] >= 2 and gaps[1] >= 2
+    # The 503s then back off exponentially from the failure count: 0.8 s, 1.6 s, 3.2 s
+    for gap, expected in zip(gaps[2:], (0.8, 1.6, 3.2)):
+        assert expected <= gap < expected + 0.6
+    assert spotify.budget.get_state()["state"] == "ok"
+    assert spotify.get_spotify_state()["song_text"] == "Song - Band"
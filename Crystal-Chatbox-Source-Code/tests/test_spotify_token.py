@@ -0,0 +1,90 @@
+"""
+Proactive token refreshes by spotify_token.TokenCache against a fake auth manager
+"""
+import json
+import time
+
+import pytest
+
+pytest.importorskip("spotipy")
+
+import spotify_token
+from spotify_token import TokenCache
+from spotipy.oauth2 import SpotifyOauthError
+
+
+class FakeAuthManager:
+    """Records refresh_access_token() calls and plays back a script of outcomes"""
+
+    def __init__(self, cache, outcomes):
+        self.cache = cache
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def refresh_access_token(self, refresh_token):
+        self.calls.append(time.monotonic())
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        if isinstance(outcome, Exception):
+            raise outcome
+        token = {"access_token": f"access-{len(self.calls)}", "refresh_token": refresh_token,
+                 "expires_at": int(time.time()) + 3600}
+        self.cache.save_token_to_cache(token)
+        return token
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(spotify_token, "RETRY_DELAY", 0.05)
+
+
+def make_cache(tmp_path, expires_in):
+    path = tmp_path / "token.json"
+    path.write_text(json.dumps({"access_token": "old", "refresh_token": "refresh",
+                                "expires_at": int(time.time()) + expires_in}))
+    return TokenCache(str(path), name="Test Token")
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_refreshes_ahead_of_expiry_and_persists(tmp_path, fast_retries):
+    cache = make_cache(tmp_path, expires_in=60)
+    auth = FakeAuthManager(cache, [ConnectionError("offline"), ConnectionError("offline")])
+    cache.attach(auth)
+
+    assert wait_for(lambda: cache.get_stats()["writes"] == 1)
+    stats = cache.get_stats()
+    assert (len(auth.calls), stats["refresh_failures"], stats["refreshes"]) == (3, 2, 1)
+    assert cache.get_cached_token()["access_token"] == "access-3"
+    assert json.loads((tmp_path / "token.json").read_text())["access_token"] == "access-3"
+
+
+def test_expired_token_is_left_to_spotipy(tmp_path, fast_retries):
+    cache = make_cache(tmp_path, expires_in=-3600)
+    auth = FakeAuthManager(cache, [ConnectionError("offline")] * 100)
+    cache.attach(auth)
+
+    time.sleep(0.5)
+    assert auth.calls == []
+    assert cache.get_stats()["refresh_failures"] == 0
+
+
+def test_rejected_refresh_token_is_not_retried(tmp_path, fast_retries):
+    cache = make_cache(tmp_path, expires_in=60)
+    rejected = SpotifyOauthError("error: invalid_grant", error="invalid_grant",
+                                 error_description="Refresh token revoked")
+    auth = FakeAuthManager(cache, [rejected] * 100)
+    cache.attach(auth)
+
+    time.sleep(0.5)
+    assert len(auth.calls) == 1
+    assert cache.get_stats()["refresh_failures"] == 1
+
+    # A token from a new OAuth flow is refreshed again in due course
+    cache.save_token_to_cache({"access_token": "new", "refresh_token": "other",
+                               "expires_at": int(time.time()) + 60})
+    assert wait_for(lambda: len(auth.calls) == 2)
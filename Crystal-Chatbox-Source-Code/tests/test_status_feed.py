@@ -0,0 +1,29 @@
+"""
+StatusFeed snapshot versioning under concurrent refreshes
+"""
+import itertools
+import threading
+import time
+
+from status_feed import StatusFeed
+
+
+def test_slow_build_never_replaces_a_newer_snapshot():
+    counter = itertools.count(1)
+
+    def build():
+        seq = next(counter)
+        # The first build is the slow one; without serialization it would finish last
+        time.sleep(0.2 if seq == 1 else 0)
+        return {"song_pos": seq}
+
+    feed = StatusFeed(build)
+    slow = threading.Thread(target=feed.refresh)
+    slow.start()
+    time.sleep(0.05)
+    _, snapshot = feed.refresh()
+    slow.join()
+
+    assert snapshot == {"song_pos": 2}
+    assert feed.current() == (2, {"song_pos": 2})
+    assert feed.changes_since(1) == (2, {"song_pos": 2})
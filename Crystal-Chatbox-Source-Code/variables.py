@@ -0,0 +1,140 @@
+"""
+Custom Message Variables
+Parses custom messages once into literal and variable segments
+"""
+import logging
+import re
+from functools import lru_cache
+
+from settings import SETTINGS
+import clock
+import spotify
+import heart_rate_monitor
+import weather_service
+import window_tracker
+import discord_rpc
+
+logger = logging.getLogger(__name__)
+
+TAG_PATTERN = re.compile(r"\{([a-z_]+)(?::([^{}]*))?\}")
+
+PROVIDERS = {}
+
+
+def variable(name):
+    """Register a provider: a function taking the optional tag argument"""
+    def decorator(func):
+        PROVIDERS[name] = func
+        return func
+    return decorator
+
+
+class Template:
+    """A parsed message: literal strings and (name, arg) variable tuples"""
+
+    __slots__ = ("segments", "variables")
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.variables = {seg for seg in segments if isinstance(seg, tuple)}
+
+
+@lru_cache(maxsize=512)
+def parse(text):
+    segments = []
+    pos = 0
+    for match in TAG_PATTERN.finditer(text):
+        name, arg = match.group(1), match.group(2)
+        if name not in PROVIDERS:
+            continue
+        if match.start() > pos:
+            segments.append(text[pos:match.start()])
+        segments.append((name, arg))
+        pos = match.end()
+    if pos < len(text):
+        segments.append(text[pos:])
+    return Template(tuple(segments))
+
+
+def expand(text):
+    """Replace variable tags, calling each referenced provider once"""
+    if not text:
+        return text
+    template = parse(text)
+    if not template.variables:
+        return text
+
+    values = {}
+    for name, arg in template.variables:
+        try:
+            values[(name, arg)] = PROVIDERS[name](arg)
+        except Exception as e:
+            logger.error(f"Variable {{{name}}} failed: {e}")
+            values[(name, arg)] = ""
+    return "".join(seg if isinstance(seg, str) else values[seg] for seg in template.segments)
+
+
+def get_variable_names():
+    return sorted(PROVIDERS)
+
+
+@variable("time")
+def _time(arg):
+    return clock.time_text(arg or SETTINGS.get("timezone", "local"))
+
+
+@variable("date")
+def _date(arg):
+    return clock.date_text(arg or SETTINGS.get("timezone", "local"))
+
+
+@variable("song")
+def _song(arg):
+    return spotify.get_spotify_state().get("song_text") or "No song playing"
+
+
+@variable("song_progress")
+def _song_progress(arg):
+    sstate = spotify.get_spotify_state()
+    if not sstate.get("song_text"):
+        return ""
+    elapsed_min, elapsed_sec = divmod(int(sstate.get("song_pos", 0)), 60)
+    total_min, total_sec = divmod(int(sstate.get("song_dur", 0)), 60)
+    return f"{elapsed_min}:{elapsed_sec:02d} / {total_min}:{total_sec:02d}"
+
+
+@variable("song_percent")
+def _song_percent(arg):
+    sstate = spotify.get_spotify_state()
+    dur = int(sstate.get("song_dur", 0))
+    if not sstate.get("song_text") or dur <= 0:
+        return ""
+    return f"{int(int(sstate.get('song_pos', 0)) / dur * 100)}%"
+
+
+@variable("bpm")
+def _bpm(arg):
+    hrstate = heart_rate_monitor.get_heart_rate_state()
+    if hrstate.get("is_connected") and hrstate.get("bpm", 0) > 0:
+        return str(hrstate["bpm"])
+    return "--"
+
+
+@variable("weather")
+def _weather(arg):
+    return weather_service.get_weather_text() or ""
+
+
+@variable("temperature")
+def _temperature(arg):
+    return weather_service.get_weather_state().get("temperature") or ""
+
+
+@variable("window")
+def _window(arg):
+    return window_tracker.get_window_state().get("app_name") or ""
+
+
+@variable("discord")
+def _discord(arg):
+    return discord_rpc.get_discord_text() or ""
@@ -2,12 +2,13 @@
 Weather Integration Service
 Displays current weather in VRChat chatbox
 """
-import requests
 import logging
 from datetime import datetime, timedelta
 import threading
 import time
 
+from settings import SETTINGS
+
 logger = logging.getLogger(__name__)
 
 # Weather state
@@ -22,6 +23,11 @@ weather_state = {
 
 weather_lock = threading.Lock()
 weather_thread = None
+state_version = 0
+
+TRACKER_NAME = "Weather Tracker"
+
+WEATHER_KEYS = ("weather_enabled", "weather_location")
 
 # Free weather service (no API key needed)
 # Using wttr.in which provides weather data in JSON format
@@ -40,12 +46,14 @@ def update_weather(location="auto"):
     Fetch weather from API
     Using wttr.in free service
     """
+    global state_version
     try:
         # Clean location
         if not location or location.lower() == "auto":
             location = ""  # Auto-detect from IP
         
         url = WEATHER_API_URL.format(location=location or "")
+        import requests
         response = requests.get(url, timeout=10)
         
         if response.status_code == 200:
@@ -82,6 +90,7 @@ def update_weather(location="auto"):
                 weather_state['location'] = location_name
                 weather_state['last_updated'] = datetime.now()
                 weather_state['emoji'] = emoji
+                state_version += 1
             
             logger.info(f"Weather updated: {temp_f}°F, {condition} in {location_name}")
             return True
@@ -91,55 +100,62 @@ def update_weather(location="auto"):
     
     return False
 
-def weather_updater_thread(interval=600, location="auto"):
-    """Background thread to update weather periodically"""
-    global weather_state
-    
+def weather_updater_thread(interval=600):
+    """Background thread: sleeps while disabled, refetches when the location changes"""
     logger.info(f"[Weather] Thread started (interval: {interval}s)")
     
     while True:
         try:
-            with weather_lock:
-                enabled = weather_state.get('enabled', False)
+            SETTINGS.wait_until(lambda s: s.get("weather_enabled", False), ("weather_enabled",))
+            seen = SETTINGS.key_version(WEATHER_KEYS)
             
-            if enabled:
-                update_weather(location)
+            update_weather(SETTINGS.get("weather_location", "auto"))
             
-            time.sleep(interval)
+            SETTINGS.wait_for_change(WEATHER_KEYS, timeout=interval, since=seen)
             
         except Exception as e:
             logger.error(f"Weather updater error: {e}")
             time.sleep(60)
 
-def start_weather_tracker(interval=600, location="auto", enabled=False):
-    """Start the weather tracking thread"""
-    global weather_thread, weather_state
+def _on_weather_enabled(key, enabled):
+    if enabled:
+        enable_weather()
+    else:
+        disable_weather()
+
+def start_weather_tracker(interval=600):
+    """Start the weather tracking thread; it follows SETTINGS["weather_enabled"]"""
+    global weather_thread, weather_state, state_version
     
     with weather_lock:
-        weather_state['enabled'] = enabled
+        weather_state['enabled'] = SETTINGS.get("weather_enabled", False)
+        state_version += 1
     
-    # Only start thread if enabled
-    if enabled and (weather_thread is None or not weather_thread.is_alive()):
+    if weather_thread is None or not weather_thread.is_alive():
+        SETTINGS.subscribe(("weather_enabled",), _on_weather_enabled)
         weather_thread = threading.Thread(
             target=weather_updater_thread,
-            args=(interval, location),
+            args=(interval,),
+            name=TRACKER_NAME,
             daemon=True
         )
         weather_thread.start()
-        
-        # Initial update
-        threading.Thread(target=update_weather, args=(location,), daemon=True).start()
 
-def enable_weather(location="auto"):
-    """Enable weather tracking"""
+def enable_weather():
+    """Mark weather as enabled; the updater thread fetches as soon as SETTINGS agrees"""
+    global state_version
     with weather_lock:
-        weather_state['enabled'] = True
-    update_weather(location)
+        if not weather_state['enabled']:
+            weather_state['enabled'] = True
+            state_version += 1
 
 def disable_weather():
     """Disable weather tracking"""
+    global state_version
     with weather_lock:
-        weather_state['enabled'] = False
+        if weather_state['enabled']:
+            weather_state['enabled'] = False
+            state_version += 1
 
 def get_weather_text():
     """Get formatted weather text for chatbox"""
@@ -8,6 +8,9 @@ window_state = {
     "app_name": ""
 }
 window_lock = threading.Lock()
+state_version = 0
+
+TRACKER_NAME = "Window Tracker"
 
 def get_window_state():
     with window_lock:
@@ -91,7 +94,7 @@ def get_active_window_macos_fallback():
 
 def start_window_tracker(interval=2):
     def tracker():
-        global window_state
+        global window_state, state_version
         
         platform = sys.platform
         print(f"[Window Tracker] Thread started (Platform: {platform})")
@@ -100,9 +103,7 @@ def start_window_tracker(interval=2):
 
         while True:
             try:
-                if not SETTINGS.get("window_tracking_enabled", False):
-                    time.sleep(interval)
-                    continue
+                SETTINGS.wait_until(lambda s: s.get("window_tracking_enabled", False), ("window_tracking_enabled",))
 
                 window_info = None
                 
@@ -115,12 +116,15 @@ def start_window_tracker(interval=2):
                         use_fallback = True
 
                 with window_lock:
+                    previous = window_state.copy()
                     if window_info:
                         window_state["window_title"] = window_info.get("title", "")
                         window_state["app_name"] = window_info.get("app", "Unknown")
                     else:
                         window_state["window_title"] = ""
                         window_state["app_name"] = "Unknown"
+                    if window_state != previous:
+                        state_version += 1
 
             except Exception as e:
                 current_time = time.time()
@@ -128,9 +132,11 @@ def start_window_tracker(interval=2):
                     print(f"[Window Tracker ERROR] {e}")
                     last_error_time = current_time
                 with window_lock:
+                    if window_state["app_name"] != "Unknown" or window_state["window_title"]:
+                        state_version += 1
                     window_state["window_title"] = ""
                     window_state["app_name"] = "Unknown"
 
             time.sleep(interval)
 
-    threading.Thread(target=tracker, daemon=True).start()
+    threading.Thread(target=tracker, name=TRACKER_NAME, daemon=True).start()